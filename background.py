@@ -1,15 +1,80 @@
+import hashlib
+import os
+
+import numpy as np
 import pygame
+from utils.assets import load_image
 from utils.constants import WIDTH, HEIGHT
 
+# Where generated backgrounds are kept between runs
+CACHE_DIR = '.cache'
+
+# Bump when the way the background is drawn changes
+BACKGROUND_VERSION = 1
+
+# Generated backgrounds by (wall image path, size)
+_backgrounds = {}
+
+
+def _cache_path(wall_image_path, size):
+    """Cache file for a wall image at a size; changes with the image."""
+    stat = os.stat(wall_image_path)
+    key = (f"{BACKGROUND_VERSION}:{os.path.abspath(wall_image_path)}:"
+           f"{stat.st_size}:{stat.st_mtime_ns}")
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR,
+                        f"background_{size[0]}x{size[1]}_{digest}.png")
+
+
+def draw_land_texture(background, land_y, color=(120, 60, 10)):
+    """Draw the short horizontal strokes on the land in one NumPy pass.
+
+    Every 10th row from ``land_y`` gets 11 pixel long strokes every 30
+    pixels, shifted by 15 pixels on every other row.
+    """
+    width, height = background.get_size()
+    xs = np.arange(width)
+    ys = np.arange(land_y, height, 10)
+    offsets = np.where((ys // 10) % 2 == 0, 15, 0)
+    # strokes[i, j]: whether pixel xs[i] is on a stroke in row ys[j]
+    shifted = xs[:, None] - offsets[None, :]
+    strokes = (shifted >= 0) & (shifted % 30 <= 10)
+
+    pixels = pygame.surfarray.pixels3d(background)
+    rows = pixels[:, land_y:height:10]
+    rows[strokes] = color
+    del rows, pixels  # Unlock the surface
+
 
 def create_game_background(wall_image_path='images/bigwall.png'):
-    """Create a background using the wall image plus a platform"""
+    """Create a background using the wall image plus a platform
+
+    The background is only generated once per image and screen size, then
+    shared, so callers must not draw on it. It is also saved under
+    ``CACHE_DIR`` for the next run.
+    """
+    size = (WIDTH, HEIGHT)
+    key = (wall_image_path, size)
+    if key in _backgrounds:
+        return _backgrounds[key]
+
+    cache_path = _cache_path(wall_image_path, size)
+    if os.path.exists(cache_path):
+        try:
+            background = pygame.image.load(cache_path)
+        except pygame.error:
+            background = None
+        if background is not None and background.get_size() == size:
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            _backgrounds[key] = background
+            return background
+
     # Load and scale the wall image
-    wall_image = pygame.image.load(wall_image_path)
-    wall_image = pygame.transform.scale(wall_image, (WIDTH, HEIGHT))
+    wall_image = load_image(wall_image_path, size)
 
     # Create background surface
-    background = pygame.Surface((WIDTH, HEIGHT))
+    background = pygame.Surface(size)
     background.blit(wall_image, (0, 0))
 
     # Create the brown land platform
@@ -19,10 +84,15 @@ def create_game_background(wall_image_path='images/bigwall.png'):
     pygame.draw.rect(background, (139, 69, 19), land)  # Brown color for land
 
     # Add some texture to the land
-    for y in range(land_y, HEIGHT, 10):
-        for x in range(0, WIDTH, 30):
-            offset = 15 if (y // 10) % 2 == 0 else 0
-            pygame.draw.line(background, (120, 60, 10),
-                             (x + offset, y), (x + offset + 10, y), 1)
+    draw_land_texture(background, land_y)
+
+    # Save for the next run; a failed write only costs the cache
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pygame.image.save(background, cache_path + '.tmp.png')
+        os.replace(cache_path + '.tmp.png', cache_path)
+    except (OSError, pygame.error):
+        pass
 
-    return background
\ No newline at end of file
+    _backgrounds[key] = background
+    return background
@@ -1,70 +1,118 @@
-import csv
+import atexit
 import os
+import secrets
+import threading
 from datetime import datetime
 
+from telemetry.backends import create_backend
 
-class DataCollector:
-    def __init__(self):
-        """Initialize the data collector for tracking game statistics."""
-        self.data_dir = "game_data"
 
-        # Ensure game_data directory exists
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+def new_session_id():
+    """Session id that stays unique across concurrent processes.
+
+    The start time comes first so ids still sort chronologically; the pid
+    and a random suffix tell apart sessions started in the same second.
+    """
+    return (f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_"
+            f"{secrets.token_hex(3)}")
 
-        # CSV file paths
-        self.skills_file = os.path.join(self.data_dir, "skills.csv")
-        self.upgrades_file = os.path.join(self.data_dir, "upgrades.csv")
-        self.damage_file = os.path.join(self.data_dir, "damage.csv")
-        self.health_file = os.path.join(self.data_dir, "health.csv")
-        self.items_file = os.path.join(self.data_dir, "items.csv")
 
-        # Initialize each file with headers if they don't exist
-        self._initialize_files()
+class DataCollector:
+    def __init__(self, buffered=False, batch_size=64, flush_interval=2.0,
+                 backend='csv'):
+        """Initialize the data collector for tracking game statistics.
+
+        Args:
+            buffered: Queue events in memory and write them in batches from
+                a background thread instead of writing on every call
+            batch_size: Number of queued events that triggers a flush
+            flush_interval: Maximum number of seconds an event stays queued
+            backend: Storage backend, "csv" for the CSV files, "binary"
+                for the binary event log in game_data/events or "sqlite"
+                for the game_data/telemetry.db database, "sharded" for a
+                per-process CSV shard under game_data/shards or "null" to
+                record nothing
+        """
+        self.data_dir = "game_data"
 
         # Track current game session
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    def _initialize_files(self):
-        """Create CSV files with headers if they don't exist."""
-        # Skills data
-        if not os.path.exists(self.skills_file):
-            with open(self.skills_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ['session_id', 'timestamp', 'floor', 'skill_name',
-                     'effect'])
-
-        # Upgrades data
-        if not os.path.exists(self.upgrades_file):
-            with open(self.upgrades_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ['session_id', 'timestamp', 'floor', 'stat_upgraded',
-                     'new_value'])
-
-        # Damage data
-        if not os.path.exists(self.damage_file):
-            with open(self.damage_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ['session_id', 'timestamp', 'floor', 'damage_dealt',
-                     'attack_type'])
-
-        # Health data
-        if not os.path.exists(self.health_file):
-            with open(self.health_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ['session_id', 'timestamp', 'floor', 'health_remaining',
-                     'max_health'])
-
-        # Items data
-        if not os.path.exists(self.items_file):
-            with open(self.items_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ['session_id', 'timestamp', 'floor', 'item_name', 'cost'])
+        self.session_id = new_session_id()
+
+        # Storage the events are written to
+        self.backend = create_backend(backend, self.data_dir, self.session_id)
+
+        # Buffered mode: events waiting to be written by the flush thread
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_lock = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._flush_thread = None
+        if self.buffered and self.backend.enabled:
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, name="DataCollectorFlush",
+                daemon=True)
+            self._flush_thread.start()
+
+        # Make sure nothing queued is lost when the interpreter exits
+        atexit.register(self.close)
+
+    def _record(self, event_type, *values):
+        """Write an event now, or queue it for the flush thread.
+
+        Args:
+            event_type: Kind of event (e.g., "skills", "damage")
+            values: Floor followed by the event's two values
+        """
+        if not self.backend.enabled:
+            return
+
+        row = [self.session_id, datetime.now(), *values]
+        if not self.buffered:
+            with self._write_lock:
+                self.backend.write([(event_type, row)])
+            return
+
+        with self._pending_lock:
+            self._pending.append((event_type, row))
+            if len(self._pending) >= self.batch_size:
+                self._pending_lock.notify()
+
+    def _flush_loop(self):
+        """Background thread: flush when the batch is full or times out."""
+        while True:
+            with self._pending_lock:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._pending_lock.wait(self.flush_interval)
+                stopping = self._closed
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self):
+        """Write every queued event to disk."""
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self.backend.write(pending)
+
+    def close(self):
+        """Flush queued events, stop the flush thread and close the files."""
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_lock.notify()
+
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+        self.flush()
+
+        with self._write_lock:
+            self.backend.close()
 
     def track_skill_use(self, floor, skill_name, effect):
         """Track when a skill is used.
@@ -74,12 +122,7 @@ class DataCollector:
             skill_name: Name of the skill used (e.g., "Magic Attack", "Heal")
             effect: Effect of the skill (e.g., damage dealt, health restored)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        with open(self.skills_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(
-                [self.session_id, timestamp, floor, skill_name, effect])
+        self._record('skills', floor, skill_name, effect)
 
     def track_upgrade(self, floor, stat_upgraded, new_value):
         """Track when a character stat is upgraded.
@@ -89,12 +132,7 @@ class DataCollector:
             stat_upgraded: Name of the stat upgraded (e.g., "Strength", "Magic", "Speed", "Health")
             new_value: New value of the stat after upgrade
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        with open(self.upgrades_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(
-                [self.session_id, timestamp, floor, stat_upgraded, new_value])
+        self._record('upgrades', floor, stat_upgraded, new_value)
 
     def track_damage(self, floor, damage_dealt, attack_type):
         """Track damage dealt to enemies.
@@ -104,12 +142,7 @@ class DataCollector:
             damage_dealt: Amount of damage dealt
             attack_type: Type of attack (e.g., "Magic", "Strength")
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        with open(self.damage_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(
-                [self.session_id, timestamp, floor, damage_dealt, attack_type])
+        self._record('damage', floor, damage_dealt, attack_type)
 
     def track_health(self, floor, health_remaining, max_health):
         """Track player health at the end of each floor.
@@ -119,13 +152,7 @@ class DataCollector:
             health_remaining: Health points remaining after the floor
             max_health: Maximum health of the player
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        with open(self.health_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(
-                [self.session_id, timestamp, floor, health_remaining,
-                 max_health])
+        self._record('health', floor, health_remaining, max_health)
 
     def track_item_purchase(self, floor, item_name, cost):
         """Track items purchased from the shop.
@@ -135,34 +162,77 @@ class DataCollector:
             item_name: Name of the item purchased
             cost: Cost of the item in coins
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._record('items', floor, item_name, cost)
+
+
+# Singleton instance of the DataCollector, created on first use so that
+# importing this module never touches the disk
+_collector = None
+_collector_lock = threading.Lock()
+
 
-        with open(self.items_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(
-                [self.session_id, timestamp, floor, item_name, cost])
+def get_collector():
+    """Return the shared collector, creating it on first use.
 
+    The backend comes from the GAME_TELEMETRY_BACKEND environment variable
+    ("csv" by default).
+    """
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                # Buffered so tracking calls never touch the disk on the
+                # render thread
+                _collector = DataCollector(
+                    buffered=True,
+                    backend=os.environ.get("GAME_TELEMETRY_BACKEND", "csv"))
+    return _collector
 
-# Create a singleton instance of the DataCollector
-collector = DataCollector()
+
+def configure(**kwargs):
+    """Replace the shared collector, e.g. ``configure(backend="null")``.
+
+    Keyword arguments are passed to DataCollector. Events queued by the
+    previous collector are flushed first.
+    """
+    global _collector
+    with _collector_lock:
+        if _collector is not None:
+            _collector.close()
+        kwargs.setdefault("buffered", True)
+        _collector = DataCollector(**kwargs)
+    return _collector
+
+
+def __getattr__(name):
+    # Keep data_collector.collector working for older callers
+    if name == "collector":
+        return get_collector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Utility functions for easier access from other modules
 def track_skill_use(floor, skill_name, effect):
-    collector.track_skill_use(floor, skill_name, effect)
+    get_collector().track_skill_use(floor, skill_name, effect)
 
 
 def track_upgrade(floor, stat_upgraded, new_value):
-    collector.track_upgrade(floor, stat_upgraded, new_value)
+    get_collector().track_upgrade(floor, stat_upgraded, new_value)
 
 
 def track_damage(floor, damage_dealt, attack_type):
-    collector.track_damage(floor, damage_dealt, attack_type)
+    get_collector().track_damage(floor, damage_dealt, attack_type)
 
 
 def track_health(floor, health_remaining, max_health):
-    collector.track_health(floor, health_remaining, max_health)
+    get_collector().track_health(floor, health_remaining, max_health)
 
 
 def track_item_purchase(floor, item_name, cost):
-    collector.track_item_purchase(floor, item_name, cost)
\ No newline at end of file
+    get_collector().track_item_purchase(floor, item_name, cost)
+
+
+def flush():
+    # Nothing to flush if nothing was ever tracked
+    if _collector is not None:
+        _collector.flush()
@@ -0,0 +1,151 @@
+"""Headless batch export of the dashboard graphs, one set per session.
+
+Renders the six dashboard graphs for every session (or the sessions given
+with --sessions) with the Agg backend and no Tk, spread over a process
+pool. Sessions whose data has not changed since their last export are
+skipped, so it can run nightly over the whole history:
+
+    python export_reports.py --out graphs --jobs 8
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import matplotlib.style
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from game_visualization import (GRAPH_NAMES, draw_graph,  # noqa: E402
+                                load_source)
+from telemetry.schema import FRAME_ORDER  # noqa: E402
+
+# Bump to re-export everything after changing how graphs look
+REPORT_VERSION = 1
+
+MANIFEST_NAME = '.export_manifest.json'
+
+
+def graph_path(out_dir, name, session_id):
+    """File name used by the dashboard's "Save All Graphs" button."""
+    return os.path.join(out_dir, f"{name}_graph_{session_id}.png")
+
+
+def fingerprint(summaries):
+    """Hash of a session's summaries; changes whenever its graphs would."""
+    digest = hashlib.sha1(str(REPORT_VERSION).encode())
+    for event_type in FRAME_ORDER:
+        digest.update(summaries[event_type].to_csv(index=False).encode())
+    return digest.hexdigest()
+
+
+def _init_worker(style):
+    # Same look as the dashboard
+    matplotlib.style.use(style)
+
+
+def render_session(session_id, summaries, out_dir):
+    """Render and save the six graphs of one session."""
+    for name in GRAPH_NAMES:
+        fig = Figure(figsize=(8, 5), dpi=100)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        draw_graph(name, summaries.__getitem__, ax)
+
+        path = graph_path(out_dir, name, session_id)
+        # Write to a temporary name so an interrupted run leaves no
+        # half-written image behind
+        fig.savefig(path + '.tmp.png')
+        os.replace(path + '.tmp.png', path)
+    return session_id
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def export_reports(out_dir='graphs', sessions=None, jobs=None, force=False,
+                   style='seaborn-v0_8-darkgrid', chunked=False):
+    """Export the graphs of every selected session that is out of date.
+
+    Args:
+        out_dir: Directory the images are written to
+        sessions: Session ids to export, all sessions by default
+        jobs: Number of worker processes, one per CPU by default
+        force: Re-export sessions even if they are up to date
+        style: Matplotlib style the graphs are drawn with
+        chunked: Aggregate the CSV files in chunks instead of loading them
+
+    Returns:
+        (number of sessions exported, number skipped)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    source = load_source(chunked)
+    if sessions is None:
+        sessions = source.sessions()
+    manifest = _load_manifest(out_dir)
+
+    # Summaries are small and cheap; the rendering is what gets parallel
+    pending = []
+    for session_id in sessions:
+        summaries = {event_type: source.summary(event_type, session_id)
+                     for event_type in FRAME_ORDER}
+        stamp = fingerprint(summaries)
+        up_to_date = (manifest.get(session_id) == stamp and all(
+            os.path.exists(graph_path(out_dir, name, session_id))
+            for name in GRAPH_NAMES))
+        if force or not up_to_date:
+            pending.append((session_id, summaries, stamp))
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(style,)) as pool:
+        futures = {pool.submit(render_session, session_id, summaries,
+                               out_dir): stamp
+                   for session_id, summaries, stamp in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            manifest[future.result()] = futures[future]
+            # Save progress now and then so a killed run can resume
+            if done % 100 == 0:
+                _save_manifest(out_dir, manifest)
+
+    _save_manifest(out_dir, manifest)
+    return len(pending), len(sessions) - len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the dashboard graphs of every session.")
+    parser.add_argument('--sessions', nargs='+', metavar='SESSION_ID',
+                        help="only export these sessions")
+    parser.add_argument('--out', default='graphs',
+                        help="output directory (default: graphs)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true',
+                        help="re-export sessions that are up to date")
+    parser.add_argument('--chunked', action='store_true',
+                        help="aggregate the CSV files in chunks, for "
+                             "histories too big to load into memory")
+    args = parser.parse_args()
+
+    exported, skipped = export_reports(args.out, args.sessions, args.jobs,
+                                       args.force, chunked=args.chunked)
+    print(f"Exported {exported} sessions, {skipped} already up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,59 @@
+import random
+
 import pygame
 from models.player import Hero
 from models.enemy import Enemy
 from game.shop import Shop
-from game.battle import battle
-from game.upgrade import upgrade_menu
+from game.battle import Battle
+from game.scene import MessageScene, Scene
+from game.upgrade import UpgradeMenu
+from game.headless import use_dummy_drivers
+from simulation import rules
 from utils.constants import WIDTH, HEIGHT, WHITE
-from utils.display import display_text
+from utils.assets import load_image, preload
+from utils.profiler import FrameProfiler
+from utils.render import Blit, Box, DirtyRenderer, text_sprite
 from background import create_game_background
 import data_collector
 
+# Frames per second the game loop is capped at
+FPS = 60
+
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, fps=FPS, frame_time=None, script=None,
+                 seed=None):
+        """The game window and the loop that runs its scenes.
+
+        Args:
+            headless: Run without a window or sound, on SDL's dummy drivers
+            fps: Frame rate cap, or 0 to run as fast as possible
+            frame_time: Milliseconds each frame moves the game's timers on
+                by, or None for the real time between frames
+            script: ScriptedInput posting events into the loop, if any
+            seed: Seed of the game's random draws, to replay a run
+        """
+        if headless:
+            use_dummy_drivers()
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         self.clock = pygame.time.Clock()
-        self.initialize_game()
+        self.fps = fps
+        self.frame_time = frame_time
+        self.script = script
+        # Frames run so far
+        self.frame = 0
+        # Random stream of this game's fights
+        self.rng = random.Random(seed)
+        # Load every image once, in the display's pixel format
+        preload()
 
         # Load additional images
-        self.coin_image = pygame.image.load('images/coins.png')
-        self.coin_image = pygame.transform.scale(self.coin_image, (20, 20))
+        self.coin_image = load_image('images/coins.png', (20, 20))
+
+        # Frame timings and debug info, shown with the debug key
+        self.profiler = FrameProfiler(details=self.debug_lines)
+        self.initialize_game()
 
     def initialize_game(self):
         """Initialize or reset all game states and objects"""
@@ -37,6 +71,8 @@ class Game:
 
         # Create the background with platform
         self.background = create_game_background()
+        # Only the parts of the screen that change get redrawn
+        self.renderer = DirtyRenderer(self.screen, self.background)
 
         # Position characters on the platform
         land_height = 150
@@ -44,127 +80,207 @@ class Game:
         self.hero.y = land_y - 50  # 50 is the height of the character
         self.enemy.y = land_y - 50  # Position enemy on platform too
         self.game_running = True
+        self.change_scene(LevelScene(self))
 
-    def run(self):
+    def change_scene(self, scene):
+        """Show another scene from the next frame on."""
+        self.scene = scene
+        self.renderer.reset(scene.backdrop)
+        # Battles and the shop are profiled when a capture is armed
+        self.profiler.scene_changed(type(scene).__name__.lower(),
+                                    isinstance(scene, (Battle, Shop)))
+
+    def run(self, max_frames=None):
+        """The game loop: one clock and one frame for whichever scene is on.
+
+        Args:
+            max_frames: Stop after this many frames, e.g. for benchmarks
+
+        Returns:
+            Number of frames run
+        """
         self.game_running = True
-        while self.game_running:
-            self.screen.blit(self.background, (0, 0))
+        while self.game_running and (max_frames is None
+                                     or self.frame < max_frames):
+            # Milliseconds since the last frame, for the scene's timers
+            dt = self.clock.tick(self.fps)
+            if self.frame_time is not None:
+                dt = self.frame_time
+            self.profiler.begin_frame()
+            if self.script is not None:
+                self.script.post(self.frame)
             self.handle_events()
-
-            if not self.shop_open:
-                if self.show_characters:
-                    self.hero.draw(self.screen)
-                    self.enemy.draw(self.screen)
-                self.display_hero_stats()
-                pygame.draw.rect(self.screen, (200, 200, 200),
-                                 self.shop_button)
-                display_text(self.screen, "Shop", WIDTH - 105, 30)
-                display_text(self.screen, f"Level: {self.current_level}",
-                             WIDTH // 2 - 50, 20)
-                display_text(self.screen, "Click on the enemy to battle",
-                             WIDTH // 2 - 150, HEIGHT // 2)
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.profiler.mark('events')
+            self.scene.update(dt)
+            self.profiler.mark('update')
+            # Only regions that changed since the last frame are updated
+            self.renderer.render(self.scene.sprites()
+                                 + self.profiler.sprites())
+            self.profiler.mark('draw')
+            self.profiler.end_frame(self.renderer.flip_time,
+                                    self.clock.get_fps())
+            self.frame += 1
+
+        self.profiler.close()
+        data_collector.flush()
+        pygame.quit()
+        return self.frame
 
     def handle_events(self):
-        """Handle all user events, including input and quitting."""
+        """Handle quitting, and pass every other event to the scene."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-
-                # Check if shop button was clicked
-                if self.shop_button.collidepoint(mouse_x, mouse_y):
-                    self.shop_open = True
-                    self.open_shop()
-
-                # Check if enemy was clicked
-                enemy_rect = pygame.Rect(self.enemy.x, self.enemy.y, 50, 50)
-                if enemy_rect.collidepoint(mouse_x, mouse_y):
-                    self.start_battle()
-
-            # Keep the debug key
-            elif event.type == pygame.KEYDOWN:
-                # Debug key - print positions
-                if event.key == pygame.K_d:
-                    print(f"Hero: ({self.hero.x}, {self.hero.y})")
-                    print(f"Enemy: ({self.enemy.x}, {self.enemy.y})")
-                    print(f"Current level: {self.current_level}")
-                    print(
-                        f"Enemy stats - HP: {self.enemy.hp}, ATK: {self.enemy.attack_power}")
-
-    def display_hero_stats(self):
-        """Display hero stats (HP and Coins)."""
-        # Draw health icon
-        self.screen.blit(self.hero.health_icon, (30, 50))
-        display_text(self.screen, f": {self.hero.hp}/{self.hero.max_hp}", 50,
-                     50)
-        # Draw coin image before coin text
-        self.screen.blit(self.coin_image, (WIDTH - 250, 20))
-        display_text(self.screen, f": {self.hero.coins}", WIDTH - 225, 20,
-                     (0, 255, 0))
+                self.game_running = False
+                return
+            if event.type == pygame.KEYDOWN:
+                self.handle_profiler_key(event.key)
+            self.scene.handle_event(event)
+
+    def handle_profiler_key(self, key):
+        """D shows the frame-time and debug overlay; with it shown, R
+        records the frame timings to a file and P arms cProfile and
+        tracemalloc for the next battles and shop visits."""
+        if key == pygame.K_d:
+            self.profiler.toggle_overlay()
+        elif not self.profiler.visible:
+            return
+        elif key == pygame.K_r:
+            self.profiler.toggle_recording()
+        elif key == pygame.K_p:
+            self.profiler.toggle_capture()
+
+    def debug_lines(self):
+        """Level, positions and enemy stats, shown in the overlay."""
+        return [f"Level {self.current_level}   enemy HP {self.enemy.hp}, "
+                f"ATK {self.enemy.attack_power}",
+                f"Hero ({self.hero.x}, {self.hero.y})   "
+                f"enemy ({self.enemy.x}, {self.enemy.y})"]
 
     def open_shop(self):
         """Handle the shop opening logic."""
-        shop = Shop(self.hero, self.screen, self.background,
-                    self.coin_image)  # Pass the images to the shop
-        shop.run()  # Run the shop loop
-        self.shop_open = False  # Close the shop after the user exits it
+        self.shop_open = True
+        self.change_scene(Shop(self.hero, self.screen, self.background,
+                               self.coin_image,
+                               on_close=self.close_shop))  # Pass the images
+
+    def close_shop(self):
+        """Go back to the level after the user exits the shop."""
+        self.shop_open = False
+        self.change_scene(LevelScene(self))
 
     def start_battle(self):
         """Start a battle between the hero and an enemy."""
         print("Starting battle...")  # Debug print
+        # Store current level in hero for tracking purposes
+        self.hero.current_level = self.current_level
         # Use the currently displayed enemy (which has the correct level)
-        battle_result = battle(self.hero, self.enemy, self.current_level,
-                               self.screen, self,
-                               self.background)  # Pass background
-
-        if battle_result:
-            # Increment stats
-            self.enemies_defeated += 1
-
-            # Display victory message
-            self.screen.blit(self.background, (0, 0))  # Use background
-            display_text(self.screen,
-                         f"You defeated the level {self.current_level} enemy!",
-                         WIDTH // 2 - 150, HEIGHT // 2)
-            pygame.display.flip()
-            pygame.time.delay(1000)  # Wait for 1 second
-
-            # Show upgrade menu after victory
-            upgrade_menu(self.hero, self.screen, self.background)
-
-            # Give fixed 20 coins after winning
-            coins_reward = 20
-            self.hero.coins += coins_reward
-
-            # Advance to next level and create a stronger enemy
-            self.current_level += 1
-            self.enemy = Enemy(level=self.current_level)
-
-            # Make sure the new enemy is positioned on the platform
-            land_height = 150
-            land_y = HEIGHT - land_height
-            self.enemy.y = land_y - 50
-
-            # Display level up message
-            self.screen.blit(self.background, (0, 0))  # Use background
-            display_text(self.screen,
-                         f"Advancing to level {self.current_level}!",
-                         WIDTH // 2 - 150, HEIGHT // 2)
-            display_text(self.screen,
-                         f"Enemy HP: {self.enemy.hp}, Attack: {self.enemy.attack_power}",
-                         WIDTH // 2 - 200, HEIGHT // 2 + 40)
-            pygame.display.flip()
-            pygame.time.delay(1500)  # Show for 1.5 seconds
-        else:
-            self.game_over()
+        self.change_scene(Battle(self.hero, self.enemy, self.current_level,
+                                 self.screen, self, self.background))
+
+    def battle_won(self):
+        """Show the victory, then the upgrade menu."""
+        # Increment stats
+        self.enemies_defeated += 1
+
+        # Display victory message for 1 second
+        self.change_scene(MessageScene(
+            [(f"You defeated the level {self.current_level} enemy!",
+              WIDTH // 2 - 150, HEIGHT // 2)],
+            self.background, 1000, self.choose_upgrade))
+
+    def choose_upgrade(self):
+        """Show upgrade menu after victory."""
+        self.change_scene(UpgradeMenu(self.hero, self.background,
+                                      self.next_level))
+
+    def next_level(self):
+        """Advance to the next level with a stronger enemy."""
+        # Give fixed coins after winning
+        self.hero.coins += rules.LEVEL_COINS
+
+        # Advance to next level and create a stronger enemy
+        self.current_level += 1
+        self.enemy = Enemy(level=self.current_level)
+
+        # Make sure the new enemy is positioned on the platform
+        land_height = 150
+        land_y = HEIGHT - land_height
+        self.enemy.y = land_y - 50
+
+        # Display level up message for 1.5 seconds
+        self.change_scene(MessageScene(
+            [(f"Advancing to level {self.current_level}!",
+              WIDTH // 2 - 150, HEIGHT // 2),
+             (f"Enemy HP: {self.enemy.hp}, Attack: {self.enemy.attack_power}",
+              WIDTH // 2 - 200, HEIGHT // 2 + 40)],
+            self.background, 1500,
+            lambda: self.change_scene(LevelScene(self))))
 
     def game_over(self):
         """Handle game over state with New Game and Quit buttons."""
+        # Write out this run's telemetry before waiting on the player
+        data_collector.flush()
+        self.change_scene(GameOverScene(self))
+
+
+class LevelScene(Scene):
+    def __init__(self, game):
+        """The level screen: hero, enemy, stats and the shop button."""
+        super().__init__()
+        self.game = game
+        self.backdrop = game.background
+
+    def sprites(self):
+        game = self.game
+        sprites = []
+        if game.show_characters:
+            sprites += game.hero.sprites()
+            sprites += game.enemy.sprites()
+        sprites += self.hero_stats_sprites()
+        sprites.append(Box((200, 200, 200), game.shop_button))
+        sprites.append(text_sprite("Shop", WIDTH - 105, 30))
+        sprites.append(text_sprite(f"Level: {game.current_level}",
+                                   WIDTH // 2 - 50, 20))
+        sprites.append(text_sprite("Click on the enemy to battle",
+                                   WIDTH // 2 - 150, HEIGHT // 2))
+        return sprites
+
+    def hero_stats_sprites(self):
+        """Hero stats (HP and Coins) to display."""
+        hero = self.game.hero
+        return [
+            # Health icon
+            Blit(hero.health_icon, (30, 50)),
+            text_sprite(f": {hero.hp}/{hero.max_hp}", 50, 50),
+            # Coin image before coin text
+            Blit(self.game.coin_image, (WIDTH - 250, 20)),
+            text_sprite(f": {hero.coins}", WIDTH - 225, 20, (0, 255, 0)),
+        ]
+
+    def handle_event(self, event):
+        """Handle clicks on the shop and the enemy."""
+        game = self.game
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
+
+            # Check if shop button was clicked
+            if game.shop_button.collidepoint(mouse_x, mouse_y):
+                game.open_shop()
+                return
+
+            # Check if enemy was clicked
+            enemy_rect = pygame.Rect(game.enemy.x, game.enemy.y, 50, 50)
+            if enemy_rect.collidepoint(mouse_x, mouse_y):
+                game.start_battle()
+
+
+class GameOverScene(Scene):
+    def __init__(self, game):
+        """Game over screen with New Game and Quit buttons."""
+        super().__init__()
+        self.game = game
+        self.backdrop = game.background
+
         # Create buttons for New Game and Quit
         button_width = 140
         button_height = 50
@@ -174,69 +290,48 @@ class Game:
         center_y = HEIGHT // 2
 
         # Create button rectangles
-        new_game_button = pygame.Rect(
+        self.new_game_button = pygame.Rect(
             center_x - button_width - button_spacing // 2,
             center_y + 120,
             button_width,
             button_height
         )
 
-        quit_button = pygame.Rect(
+        self.quit_button = pygame.Rect(
             center_x + button_spacing // 2,
             center_y + 120,
             button_width,
             button_height
         )
 
-        # Prepare font for button text
-        font = pygame.font.SysFont(None, 36)
-        new_game_text = font.render("New Game", True, (0, 0, 0))
-        quit_text = font.render("Quit", True, (0, 0, 0))
-
-        # Get centered text rects
-        new_game_text_rect = new_game_text.get_rect(
-            center=new_game_button.center)
-        quit_text_rect = quit_text.get_rect(center=quit_button.center)
-
-        while True:
-            # Draw game over screen
-            self.screen.blit(self.background, (0, 0))  # Use background
-
+    def sprites(self):
+        game = self.game
+        center_x = WIDTH // 2
+        center_y = HEIGHT // 2
+        return [
             # Center game over texts
-            display_text(self.screen, "Game Over", center_x - 60,
-                         center_y - 20)
-            display_text(self.screen,
-                         f"You reached level {self.current_level}",
-                         center_x - 100, center_y + 20)
-            display_text(self.screen,
-                         f"Enemies defeated: {self.enemies_defeated}",
-                         center_x - 100, center_y + 60)
-
-            # Draw buttons
-            pygame.draw.rect(self.screen, (100, 255, 100),
-                             new_game_button)  # Green button
-            pygame.draw.rect(self.screen, (255, 100, 100),
-                             quit_button)  # Red button
-
-            # Blit centered text onto buttons
-            self.screen.blit(new_game_text, new_game_text_rect)
-            self.screen.blit(quit_text, quit_text_rect)
-
-            pygame.display.flip()
-
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game_running = False
-                    return
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mouse_x, mouse_y = pygame.mouse.get_pos()
-
-                    if new_game_button.collidepoint(mouse_x, mouse_y):
-                        self.initialize_game()  # Reset game state
-                        return  # Exit game_over and resume run()
-                    elif quit_button.collidepoint(mouse_x, mouse_y):
-                        self.game_running = False
-                        return
-
-            self.clock.tick(60)
+            text_sprite("Game Over", center_x - 60, center_y - 20),
+            text_sprite(f"You reached level {game.current_level}",
+                        center_x - 100, center_y + 20),
+            text_sprite(f"Enemies defeated: {game.enemies_defeated}",
+                        center_x - 100, center_y + 60),
+
+            # Buttons
+            Box((100, 255, 100), self.new_game_button),  # Green button
+            Box((255, 100, 100), self.quit_button),  # Red button
+
+            # Centered text on the buttons
+            text_sprite("New Game", *self.new_game_button.center,
+                        (0, 0, 0), center=True),
+            text_sprite("Quit", *self.quit_button.center, (0, 0, 0),
+                        center=True),
+        ]
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
+
+            if self.new_game_button.collidepoint(mouse_x, mouse_y):
+                self.game.initialize_game()  # Reset game state
+            elif self.quit_button.collidepoint(mouse_x, mouse_y):
+                self.game.game_running = False
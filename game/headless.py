@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import time
+
+import pygame
+
+# SDL drivers that open no window and no audio device
+DUMMY_DRIVERS = {'SDL_VIDEODRIVER': 'dummy', 'SDL_AUDIODRIVER': 'dummy'}
+
+# Milliseconds of game time per frame in headless runs, as at 60 FPS
+FRAME_TIME = 1000 // 60
+
+# Input that plays through every screen whatever the fights' outcomes:
+# events a screen has no use for are ignored by it
+BENCHMARK_SCRIPT = [
+    (0, 'MOUSEBUTTONDOWN', {'pos': (710, 40), 'button': 1}),    # Shop
+    (5, 'MOUSEMOTION', {'pos': (400, 275), 'rel': (0, 0),
+                        'buttons': (0, 0, 0)}),                 # Hover potion
+    (10, 'MOUSEBUTTONDOWN', {'pos': (400, 275), 'button': 1}),  # Buy potion
+    (15, 'MOUSEBUTTONDOWN', {'pos': (710, 575), 'button': 1}),  # Back
+    (20, 'MOUSEBUTTONDOWN', {'pos': (625, 425), 'button': 1}),  # Enemy
+    (25, 'MOUSEBUTTONDOWN', {'pos': (200, 495), 'button': 1}),  # Magic Attack
+    (65, 'MOUSEBUTTONDOWN', {'pos': (600, 495), 'button': 1}),  # Strength
+    (105, 'MOUSEBUTTONDOWN', {'pos': (200, 495), 'button': 1}),
+    (145, 'MOUSEBUTTONDOWN', {'pos': (600, 495), 'button': 1}),
+    (185, 'KEYDOWN', {'key': 'K_1'}),                           # Upgrade
+    (190, 'MOUSEBUTTONDOWN', {'pos': (320, 445), 'button': 1}),  # New Game
+]
+
+# Frames after which BENCHMARK_SCRIPT starts over
+BENCHMARK_PERIOD = 200
+
+
+def use_dummy_drivers():
+    """Make SDL run without a display or sound card.
+
+    Must be called before pygame.init().
+    """
+    os.environ.update(DUMMY_DRIVERS)
+
+
+def _event(type_name, attributes):
+    # Key names such as "K_1" are looked up in pygame
+    attributes = dict(attributes)
+    if isinstance(attributes.get('key'), str):
+        attributes['key'] = getattr(pygame, attributes['key'])
+    if 'pos' in attributes:
+        attributes['pos'] = tuple(attributes['pos'])
+    return pygame.event.Event(getattr(pygame, type_name), attributes)
+
+
+class ScriptedInput:
+    def __init__(self, script, period=None):
+        """Synthetic events posted to pygame's queue on given frames.
+
+        Args:
+            script: (frame, event type name, attributes) entries, e.g.
+                (20, "MOUSEBUTTONDOWN", {"pos": (625, 425), "button": 1})
+            period: Frames after which the script starts over, or None to
+                play it once
+        """
+        self.period = period
+        self.events = {}
+        for frame, type_name, attributes in script:
+            self.events.setdefault(frame, []).append(
+                _event(type_name, attributes))
+
+    @classmethod
+    def load(cls, path, period=None):
+        """Script read from a JSON list of [frame, type, attributes]."""
+        with open(path) as f:
+            return cls(json.load(f), period)
+
+    def post(self, frame):
+        """Post the events due on ``frame``."""
+        if self.period:
+            frame %= self.period
+        for event in self.events.get(frame, ()):
+            pygame.event.post(event)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the game without a window, e.g. for benchmarks.")
+    parser.add_argument('--frames', type=int, default=10000,
+                        help='number of frames to run')
+    parser.add_argument('--script',
+                        help='JSON input script, instead of the built-in one')
+    parser.add_argument('--period', type=int,
+                        help='frames after which the script starts over')
+    parser.add_argument('--fps', type=int, default=0,
+                        help='frame rate cap (default: uncapped)')
+    parser.add_argument('--seed', type=int,
+                        help='seed of the fights, to replay a run')
+    parser.add_argument('--telemetry', action='store_true',
+                        help='write the run\'s events to game_data')
+    args = parser.parse_args()
+
+    import data_collector
+    from game.game import Game
+
+    if not args.telemetry:
+        data_collector.configure(backend='null')
+    if args.script:
+        script = ScriptedInput.load(args.script, args.period)
+    else:
+        script = ScriptedInput(BENCHMARK_SCRIPT,
+                               args.period or BENCHMARK_PERIOD)
+
+    game = Game(headless=True, fps=args.fps, frame_time=FRAME_TIME,
+                script=script, seed=args.seed)
+    start = time.perf_counter()
+    frames = game.run(args.frames)
+    elapsed = time.perf_counter() - start
+
+    print(f"{frames} frames in {elapsed:.2f} s: "
+          f"{frames / elapsed:.0f} frames per second")
+    print(f"Reached level {game.current_level}, "
+          f"enemies defeated: {game.enemies_defeated}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import heapq
+import itertools
+
+from utils.render import text_sprite
+
+
+class Timeline:
+    def __init__(self):
+        """Callbacks run after a delay on the game clock.
+
+        Used instead of pygame.time.delay(), so the window keeps handling
+        events and drawing frames while a scene waits.
+        """
+        self.now = 0
+        self.pending = []
+        # Keeps callbacks due at the same time in the order they were added
+        self.counter = itertools.count()
+
+    def after(self, delay, callback):
+        """Run ``callback()`` once ``delay`` milliseconds have passed."""
+        heapq.heappush(self.pending,
+                       (self.now + delay, next(self.counter), callback))
+
+    def advance(self, dt):
+        """Move the clock on by ``dt`` milliseconds, running what is due."""
+        self.now += dt
+        while self.pending and self.pending[0][0] <= self.now:
+            _, _, callback = heapq.heappop(self.pending)
+            callback()
+
+    @property
+    def busy(self):
+        """Whether callbacks are still waiting to run."""
+        return bool(self.pending)
+
+
+class Scene:
+    """One screen of the game, driven by the single loop in Game.run.
+
+    Every frame the loop passes each event to handle_event(), advances
+    update() by the milliseconds since the last frame, then draws sprites()
+    over ``backdrop``. A scene ends by asking the game to change to the
+    next scene.
+    """
+    # Surface behind the scene's sprites
+    backdrop = None
+
+    def __init__(self):
+        self.timeline = Timeline()
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        self.timeline.advance(dt)
+
+    def sprites(self):
+        return []
+
+
+class MessageScene(Scene):
+    def __init__(self, lines, background, duration, on_done):
+        """Text shown over the background for a while, e.g. level changes.
+
+        Args:
+            lines: (text, x, y) of each line
+            background: Surface behind the text
+            duration: Milliseconds the message stays up
+            on_done: Called when the time is up
+        """
+        super().__init__()
+        self.lines = lines
+        self.backdrop = background
+        self.timeline.after(duration, on_done)
+
+    def sprites(self):
+        return [text_sprite(text, x, y) for text, x, y in self.lines]
@@ -1,52 +1,48 @@
 import pygame
-from utils.display import display_text
-from utils.constants import WHITE
+from game.scene import Scene
+from simulation import rules
+from utils.render import text_sprite
 import data_collector
 
+# Upgrade chosen by each key of the menu
+UPGRADE_KEYS = {
+    pygame.K_1: rules.STRENGTH,
+    pygame.K_2: rules.MAGIC,
+    pygame.K_3: rules.SPEED,
+    pygame.K_4: rules.HEALTH,
+}
 
-def upgrade_menu(hero, screen, background):
-    choosing = True
-    while choosing:
-        screen.blit(background, (0, 0))  # Use background image
-        display_text(screen, "Choose an upgrade:", 300, 200)
-        display_text(screen, "1. Strength +1", 300, 240)
-        display_text(screen, "2. Magic +1", 300, 280)
-        display_text(screen, "3. Speed +0.1", 300, 320)
-        display_text(screen, "4. Health +50", 300, 360)
-        pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    hero.strength_level += 1
-                    # Track the strength upgrade
-                    data_collector.track_upgrade(hero.current_level,
-                                                 "Strength",
-                                                 hero.strength_level)
-                    choosing = False
-                elif event.key == pygame.K_2:
-                    hero.magic_level += 1
-                    # Track the magic upgrade
-                    data_collector.track_upgrade(hero.current_level, "Magic",
-                                                 hero.magic_level)
-                    choosing = False
-                elif event.key == pygame.K_3:
-                    hero.speed += 0.1
-                    # Track the speed upgrade
-                    data_collector.track_upgrade(hero.current_level, "Speed",
-                                                 hero.speed)
-                    choosing = False
-                elif event.key == pygame.K_4:
-                    hero.max_hp += 50
-                    hero.hp += 50
-                    # Track the health upgrade
-                    data_collector.track_upgrade(hero.current_level, "Health",
-                                                 hero.max_hp)
-                    choosing = False
+class UpgradeMenu(Scene):
+    def __init__(self, hero, background, on_done):
+        """Menu where the hero picks a stat upgrade after a victory.
 
-                # Give coins after any upgrade
-                if not choosing:
-                    hero.coins += 10
\ No newline at end of file
+        Args:
+            hero: Hero to upgrade
+            background: Surface behind the menu
+            on_done: Called once an upgrade was chosen
+        """
+        super().__init__()
+        self.hero = hero
+        self.backdrop = background
+        self.on_done = on_done
+
+    def sprites(self):
+        return [
+            text_sprite("Choose an upgrade:", 300, 200),
+            text_sprite("1. Strength +1", 300, 240),
+            text_sprite("2. Magic +1", 300, 280),
+            text_sprite("3. Speed +0.1", 300, 320),
+            text_sprite("4. Health +50", 300, 360),
+        ]
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        choice = UPGRADE_KEYS.get(event.key)
+        if choice is None:
+            return
+        # Apply the upgrade and give its coins, then track it
+        value = rules.upgrade(self.hero, choice)
+        data_collector.track_upgrade(self.hero.current_level, choice, value)
+        self.on_done()
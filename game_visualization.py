@@ -1,10 +1,19 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import argparse
 import os
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import tkinter as tk
-from tkinter import ttk, messagebox  # Added messagebox import
+import re
+from telemetry.aggregate import ROLLUP_CACHE_NAME, LiveSource, load_chunked
+from telemetry.binlog import read_event_log
+from telemetry.frames import read_event_csv
+from telemetry.ingest import IngestCache
+from telemetry.schema import FRAME_ORDER
+from telemetry.shards import compact_shards
+from telemetry.sqlite_store import SqliteSource
+from telemetry.summaries import (FrameSource, summarize_damage,
+                                 summarize_health, summarize_items,
+                                 summarize_skills, summarize_upgrades)
 
 
 # Function to read and process CSV files
@@ -12,32 +21,75 @@ def read_csv_files():
     # Set the data directory
     data_dir = 'game_data'
 
-    # Read CSV files from the game_data folder
-    damage_df = pd.read_csv(os.path.join(data_dir, 'damage.csv'), header=None,
-                            names=['session_id', 'timestamp', 'level',
-                                   'damage', 'attack_type'])
-    health_df = pd.read_csv(os.path.join(data_dir, 'health.csv'), header=None,
-                            names=['session_id', 'timestamp', 'level',
-                                   'health', 'max_health'])
-    items_df = pd.read_csv(os.path.join(data_dir, 'items.csv'), header=None,
-                           names=['session_id', 'timestamp', 'level',
-                                  'item_name', 'value'])
-    skills_df = pd.read_csv(os.path.join(data_dir, 'skills.csv'), header=None,
-                            names=['session_id', 'timestamp', 'level',
-                                   'skill_name', 'value'])
-    upgrades_df = pd.read_csv(os.path.join(data_dir, 'upgrades.csv'),
-                              header=None,
-                              names=['session_id', 'timestamp', 'level',
-                                     'attribute', 'value'])
-
-    return damage_df, health_df, items_df, skills_df, upgrades_df
+    # Read CSV files from the game_data folder with compact column types:
+    # categorical names and sessions, small integers, parsed timestamps
+    return tuple(
+        read_event_csv(os.path.join(data_dir, f'{event_type}.csv'),
+                       event_type)
+        for event_type in FRAME_ORDER)
+
+
+# Parsed CSV frames cached across runs, so only new rows get parsed
+ingest_cache = IngestCache('game_data')
+
+# Per-level rollups of the CSV files the dashboard is answered from
+rollup_cache = os.path.join('game_data', '.cache', ROLLUP_CACHE_NAME)
+
+
+# Function to read the game data from the binary event log or the CSV files
+def read_game_data():
+    # Prefer the binary event log when the game has been writing one
+    log_dir = os.path.join('game_data', 'events')
+    if os.path.isdir(log_dir):
+        return read_event_log(log_dir)
+    return ingest_cache.load()
+
+
+# Function to turn the session filter text into a session selection
+def parse_session_filter(text):
+    text = text.strip()
+    if not text or text == "All Sessions":
+        return None
+    # "first..last" selects every session in between
+    if '..' in text:
+        first, last = (part.strip() for part in text.split('..', 1))
+        return slice(first or None, last or None)
+    # "a, b" selects several sessions
+    if ',' in text:
+        return [part.strip() for part in text.split(',') if part.strip()]
+    return text
+
+
+# Function to pick where the graphs get their data from
+def load_source(chunked=False, live=False, frames=False):
+    # The live mode follows the CSV files while the game appends to them
+    if not live:
+        # Histories too big for memory are rolled up a chunk at a time
+        if chunked:
+            return load_chunked('game_data')
+        # The raw events, kept in memory and indexed by session
+        if frames:
+            return FrameSource(*read_game_data())
+        # The SQLite database answers the graph queries itself
+        db_path = os.path.join('game_data', 'telemetry.db')
+        if os.path.exists(db_path):
+            return SqliteSource(db_path)
+        # Prefer the binary event log when the game has been writing one
+        log_dir = os.path.join('game_data', 'events')
+        if os.path.isdir(log_dir):
+            return FrameSource(*read_event_log(log_dir))
+    # Otherwise the graphs are answered from rollups of the CSV files,
+    # persisted so only rows appended since the last run are read
+    return LiveSource('game_data', rollup_cache)
 
 
 # Function to create damage graph
 def plot_damage_graph(damage_df, ax):
     # Group by level and calculate mean damage
-    damage_by_level = damage_df.groupby('level')['damage'].mean().reset_index()
+    return draw_damage_graph(summarize_damage(damage_df), ax)
 
+
+def draw_damage_graph(damage_by_level, ax):
     # Create bar chart
     ax.bar(damage_by_level['level'], damage_by_level['damage'], color='blue',
            alpha=0.7)
@@ -47,7 +99,7 @@ def plot_damage_graph(damage_df, ax):
     ax.grid(True, linestyle='--', alpha=0.6)
 
     # Set x-ticks to integer values
-    ax.set_xticks(np.unique(damage_df['level']))
+    ax.set_xticks(np.unique(damage_by_level['level']))
 
     return ax
 
@@ -55,11 +107,10 @@ def plot_damage_graph(damage_df, ax):
 # Function to create health graph
 def plot_health_graph(health_df, ax):
     # Group by level
-    health_by_level = health_df.groupby('level').agg({
-        'health': 'mean',
-        'max_health': 'first'  # All max_health values are the same per level
-    }).reset_index()
+    return draw_health_graph(summarize_health(health_df), ax)
+
 
+def draw_health_graph(health_by_level, ax):
     # Create line chart
     ax.plot(health_by_level['level'], health_by_level['health'], 'o-',
             color='green', label='Health')
@@ -72,7 +123,7 @@ def plot_health_graph(health_df, ax):
     ax.legend()
 
     # Set x-ticks to integer values
-    ax.set_xticks(np.unique(health_df['level']))
+    ax.set_xticks(np.unique(health_by_level['level']))
 
     return ax
 
@@ -80,9 +131,10 @@ def plot_health_graph(health_df, ax):
 # Function to create items graph
 def plot_items_graph(items_df, ax):
     # Count occurrences of each item
-    item_counts = items_df['item_name'].value_counts().reset_index()
-    item_counts.columns = ['item_name', 'count']
+    return draw_items_graph(summarize_items(items_df), ax)
 
+
+def draw_items_graph(item_counts, ax):
     # Create horizontal bar chart
     bars = ax.barh(item_counts['item_name'], item_counts['count'],
                    color='purple', alpha=0.7)
@@ -104,9 +156,10 @@ def plot_items_graph(items_df, ax):
 # Function to create skills graph
 def plot_skills_graph(skills_df, ax):
     # Group by level and skill_name
-    skill_by_level = skills_df.groupby(['level', 'skill_name'])[
-        'value'].mean().reset_index()
+    return draw_skills_graph(summarize_skills(skills_df), ax)
+
 
+def draw_skills_graph(skill_by_level, ax):
     # Create line chart for each skill
     for skill in skill_by_level['skill_name'].unique():
         skill_data = skill_by_level[skill_by_level['skill_name'] == skill]
@@ -119,7 +172,7 @@ def plot_skills_graph(skills_df, ax):
     ax.legend()
 
     # Set x-ticks to integer values
-    ax.set_xticks(np.unique(skills_df['level']))
+    ax.set_xticks(np.unique(skill_by_level['level']))
 
     return ax
 
@@ -127,9 +180,10 @@ def plot_skills_graph(skills_df, ax):
 # Function to create upgrades graph
 def plot_upgrades_graph(upgrades_df, ax):
     # Group by level and attribute
-    upgrades_by_level = upgrades_df.groupby(['level', 'attribute'])[
-        'value'].max().reset_index()
+    return draw_upgrades_graph(summarize_upgrades(upgrades_df), ax)
+
 
+def draw_upgrades_graph(upgrades_by_level, ax):
     # Create line chart for each attribute
     for attr in upgrades_by_level['attribute'].unique():
         attr_data = upgrades_by_level[upgrades_by_level['attribute'] == attr]
@@ -142,22 +196,31 @@ def plot_upgrades_graph(upgrades_df, ax):
     ax.legend()
 
     # Set x-ticks to integer values
-    ax.set_xticks(np.unique(upgrades_df['level']))
+    ax.set_xticks(np.unique(upgrades_by_level['level']))
 
     return ax
 
 
 # Function to create correlation graph between damage and upgrades
 def plot_correlation_graph(damage_df, upgrades_df, ax):
-    # Merge damage and upgrades dataframes on level
-    # For each damage entry, find the maximum upgrade value for that level
-    damage_level = damage_df.groupby('level')['damage'].mean().reset_index()
-    upgrade_level = upgrades_df.groupby('level')['value'].max().reset_index()
+    return draw_correlation_graph(summarize_damage(damage_df),
+                                  summarize_upgrades(upgrades_df), ax)
+
+
+def correlation_data(damage_level, upgrades_by_level):
+    # Merge damage and upgrades on level
+    # For each level, take the maximum upgrade value of any attribute
+    upgrade_level = upgrades_by_level.groupby('level')[
+        'value'].max().reset_index()
 
     # Fix: Rename columns properly before merging to avoid confusion
     upgrade_level.rename(columns={'value': 'upgrade_value'}, inplace=True)
 
-    merged_df = pd.merge(damage_level, upgrade_level, on='level')
+    return pd.merge(damage_level, upgrade_level, on='level')
+
+
+def draw_correlation_graph(damage_level, upgrades_by_level, ax):
+    merged_df = correlation_data(damage_level, upgrades_by_level)
 
     # Create scatter plot
     ax.scatter(merged_df['upgrade_value'], merged_df['damage'], color='red',
@@ -182,8 +245,138 @@ def plot_correlation_graph(damage_df, upgrades_df, ax):
     return ax
 
 
+# Graphs shown by the dashboard, in tab order
+GRAPH_NAMES = ['damage', 'health', 'items', 'skills', 'upgrades',
+               'correlation']
+
+
+# Function to draw one dashboard graph from the per-level summaries
+def draw_graph(name, summary, ax):
+    # summary(event_type) returns the summary frame of that event type
+    if name == 'damage':
+        return draw_damage_graph(summary('damage'), ax)
+    if name == 'health':
+        return draw_health_graph(summary('health'), ax)
+    if name == 'items':
+        return draw_items_graph(summary('items'), ax)
+    if name == 'skills':
+        return draw_skills_graph(summary('skills'), ax)
+    if name == 'upgrades':
+        return draw_upgrades_graph(summary('upgrades'), ax)
+    return draw_correlation_graph(summary('damage'), summary('upgrades'), ax)
+
+
+# Event types each dashboard graph is drawn from
+GRAPH_EVENTS = {
+    'damage': ['damage'],
+    'health': ['health'],
+    'items': ['items'],
+    'skills': ['skills'],
+    'upgrades': ['upgrades'],
+    'correlation': ['damage', 'upgrades'],
+}
+
+
+# Function to describe what a graph's artists are made of. The live mode can
+# only update a drawn graph in place while its layout stays the same
+def graph_layout(name, summary):
+    if name == 'damage':
+        return tuple(summary('damage')['level'])
+    if name == 'items':
+        return tuple(summary('items')['item_name'])
+    if name == 'skills':
+        return tuple(summary('skills')['skill_name'].unique())
+    if name == 'upgrades':
+        return tuple(summary('upgrades')['attribute'].unique())
+    if name == 'correlation':
+        # The trend line is only drawn for two points or more
+        return len(correlation_data(summary('damage'),
+                                    summary('upgrades'))) > 1
+    # The health lines take any number of levels
+    return ()
+
+
+# Functions to move the artists drawn by the draw_* functions to new data
+def update_damage_graph(damage_by_level, ax):
+    for bar, damage in zip(ax.containers[0], damage_by_level['damage']):
+        bar.set_height(damage)
+
+
+def update_health_graph(health_by_level, ax):
+    health_line, max_health_line = ax.lines[:2]
+    health_line.set_data(health_by_level['level'], health_by_level['health'])
+    max_health_line.set_data(health_by_level['level'],
+                             health_by_level['max_health'])
+    ax.set_xticks(np.unique(health_by_level['level']))
+
+
+def update_items_graph(item_counts, ax):
+    for bar, label, count in zip(ax.containers[0], ax.texts,
+                                 item_counts['count']):
+        bar.set_width(count)
+        label.set_x(count + 0.1)
+        label.set_text(f'{count:.0f}')
+
+
+def update_lines_graph(by_level, name_column, ax):
+    # One line per skill or attribute, in the order they were drawn
+    for line, name in zip(ax.lines, by_level[name_column].unique()):
+        data = by_level[by_level[name_column] == name]
+        line.set_data(data['level'], data['value'])
+    ax.set_xticks(np.unique(by_level['level']))
+
+
+def update_correlation_graph(damage_level, upgrades_by_level, ax):
+    merged_df = correlation_data(damage_level, upgrades_by_level)
+    points = np.column_stack([merged_df['upgrade_value'],
+                              merged_df['damage']])
+    ax.collections[0].set_offsets(points)
+
+    if len(merged_df) > 1:
+        z = np.polyfit(merged_df['upgrade_value'], merged_df['damage'], 1)
+        p = np.poly1d(z)
+        ax.lines[0].set_data(merged_df['upgrade_value'],
+                             p(merged_df['upgrade_value']))
+        corr = merged_df['upgrade_value'].corr(merged_df['damage'])
+        ax.texts[0].set_text(f'Correlation: {corr:.2f}')
+
+    # Scatter points are not picked up by relim
+    ax.relim()
+    ax.update_datalim(points)
+    ax.autoscale_view()
+
+
+# Function to update one drawn dashboard graph in place, without clearing
+# the axes; only valid while graph_layout() is unchanged
+def update_graph(name, summary, ax):
+    if name == 'correlation':
+        return update_correlation_graph(summary('damage'),
+                                        summary('upgrades'), ax)
+    if name == 'damage':
+        update_damage_graph(summary('damage'), ax)
+    elif name == 'health':
+        update_health_graph(summary('health'), ax)
+    elif name == 'items':
+        update_items_graph(summary('items'), ax)
+    elif name == 'skills':
+        update_lines_graph(summary('skills'), 'skill_name', ax)
+    else:
+        update_lines_graph(summary('upgrades'), 'attribute', ax)
+    ax.relim()
+    ax.autoscale_view()
+
+
+# Milliseconds between two checks for new data in live mode
+LIVE_INTERVAL = 1000
+
+
 # Function to create the main application
-def create_app():
+def create_app(chunked=False, live=False, frames=False):
+    # Tk is only needed for the GUI, not for the plotting functions
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    import tkinter as tk
+    from tkinter import ttk, messagebox  # Added messagebox import
+
     # Create the main window
     root = tk.Tk()
     root.title("Game Data Visualization")
@@ -191,7 +384,7 @@ def create_app():
 
     # Try to read the data
     try:
-        damage_df, health_df, items_df, skills_df, upgrades_df = read_csv_files()
+        source = load_source(chunked, live, frames)
     except FileNotFoundError as e:
         tk.Label(root, text=f"Error: {e}", fg="red", font=("Arial", 12)).pack(
             pady=20)
@@ -201,64 +394,50 @@ def create_app():
     notebook = ttk.Notebook(root)
     notebook.pack(fill='both', expand=True, padx=10, pady=10)
 
-    # Create tabs for each graph
-    tab_damage = ttk.Frame(notebook)
-    tab_health = ttk.Frame(notebook)
-    tab_items = ttk.Frame(notebook)
-    tab_skills = ttk.Frame(notebook)
-    tab_upgrades = ttk.Frame(notebook)
-    tab_correlation = ttk.Frame(notebook)
-
-    notebook.add(tab_damage, text='Damage')
-    notebook.add(tab_health, text='Health')
-    notebook.add(tab_items, text='Items')
-    notebook.add(tab_skills, text='Skills')
-    notebook.add(tab_upgrades, text='Upgrades')
-    notebook.add(tab_correlation, text='Correlation')
-
-    # Create and place the figures and canvases for each tab
-
-    # Damage tab
-    fig_damage, ax_damage = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_damage_graph(damage_df, ax_damage)
-    canvas_damage = FigureCanvasTkAgg(fig_damage, master=tab_damage)
-    canvas_damage.draw()
-    canvas_damage.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Health tab
-    fig_health, ax_health = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_health_graph(health_df, ax_health)
-    canvas_health = FigureCanvasTkAgg(fig_health, master=tab_health)
-    canvas_health.draw()
-    canvas_health.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Items tab
-    fig_items, ax_items = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_items_graph(items_df, ax_items)
-    canvas_items = FigureCanvasTkAgg(fig_items, master=tab_items)
-    canvas_items.draw()
-    canvas_items.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Skills tab
-    fig_skills, ax_skills = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_skills_graph(skills_df, ax_skills)
-    canvas_skills = FigureCanvasTkAgg(fig_skills, master=tab_skills)
-    canvas_skills.draw()
-    canvas_skills.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Upgrades tab
-    fig_upgrades, ax_upgrades = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_upgrades_graph(upgrades_df, ax_upgrades)
-    canvas_upgrades = FigureCanvasTkAgg(fig_upgrades, master=tab_upgrades)
-    canvas_upgrades.draw()
-    canvas_upgrades.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Correlation tab
-    fig_corr, ax_corr = plt.subplots(figsize=(8, 5), dpi=100)
-    plot_correlation_graph(damage_df, upgrades_df, ax_corr)
-    canvas_corr = FigureCanvasTkAgg(fig_corr, master=tab_correlation)
-    canvas_corr.draw()
-    canvas_corr.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    # Create tabs for each graph. Figures are only created and drawn when
+    # their tab is shown; hidden tabs are just marked stale on changes
+    tabs = {}
+    for name in GRAPH_NAMES:
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=name.capitalize())
+        tabs[name] = {'frame': frame, 'fig': None, 'ax': None,
+                      'canvas': None, 'stale': True, 'drawn': False,
+                      'layout': None}
+
+    # Summaries for the current filter, shared by the tabs that need them
+    summaries = {}
+
+    def summary(event_type):
+        if event_type not in summaries:
+            summaries[event_type] = source.summary(
+                event_type, parse_session_filter(session_var.get()))
+        return summaries[event_type]
+
+    # Function to bring a tab's figure up to date with the filter
+    def plot_tab(name):
+        tab = tabs[name]
+        if tab['fig'] is None:
+            tab['fig'], tab['ax'] = plt.subplots(figsize=(8, 5), dpi=100)
+            tab['canvas'] = FigureCanvasTkAgg(tab['fig'], master=tab['frame'])
+            tab['canvas'].get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        else:
+            tab['ax'].clear()
+        draw_graph(name, summary, tab['ax'])
+        tab['layout'] = graph_layout(name, summary)
+        tab['stale'] = False
+        tab['drawn'] = False
+
+    # Function to render the visible tab if its data changed
+    def show_current_tab(*args):
+        name = GRAPH_NAMES[notebook.index('current')]
+        tab = tabs[name]
+        if tab['stale']:
+            plot_tab(name)
+        if not tab['drawn']:
+            tab['canvas'].draw()
+            tab['drawn'] = True
+
+    notebook.bind('<<NotebookTabChanged>>', show_current_tab)
 
     # Add session filter
     session_frame = tk.Frame(root)
@@ -267,7 +446,7 @@ def create_app():
     tk.Label(session_frame, text="Filter by Session:").pack(side='left')
 
     # Get unique sessions
-    sessions = damage_df['session_id'].unique()
+    sessions = source.sessions()
 
     # Create session variable and dropdown
     session_var = tk.StringVar(root)
@@ -277,56 +456,30 @@ def create_app():
     session_dropdown['values'] = ['All Sessions'] + list(sessions)
     session_dropdown.pack(side='left', padx=5)
 
-    # Function to update graphs based on session filter
-    def update_graphs(*args):
-        selected_session = session_var.get()
-
-        # Filter data if a specific session is selected
-        if selected_session != "All Sessions":
-            filtered_damage = damage_df[
-                damage_df['session_id'] == selected_session]
-            filtered_health = health_df[
-                health_df['session_id'] == selected_session]
-            filtered_items = items_df[
-                items_df['session_id'] == selected_session]
-            filtered_skills = skills_df[
-                skills_df['session_id'] == selected_session]
-            filtered_upgrades = upgrades_df[
-                upgrades_df['session_id'] == selected_session]
-        else:
-            filtered_damage = damage_df
-            filtered_health = health_df
-            filtered_items = items_df
-            filtered_skills = skills_df
-            filtered_upgrades = upgrades_df
-
-        # Clear and redraw each graph
-        ax_damage.clear()
-        plot_damage_graph(filtered_damage, ax_damage)
-        canvas_damage.draw()
-
-        ax_health.clear()
-        plot_health_graph(filtered_health, ax_health)
-        canvas_health.draw()
+    # Several sessions can be typed in, then applied with Enter
+    tk.Label(session_frame, text="id, id1, id2 or first..last",
+             fg="grey").pack(side='left')
 
-        ax_items.clear()
-        plot_items_graph(filtered_items, ax_items)
-        canvas_items.draw()
+    # Function to pick up rows recorded since the data was loaded
+    def refresh_data():
+        nonlocal source
+        source = load_source(chunked, live, frames)
+        session_dropdown['values'] = ['All Sessions'] + list(
+            source.sessions())
+        update_graphs()
 
-        ax_skills.clear()
-        plot_skills_graph(filtered_skills, ax_skills)
-        canvas_skills.draw()
-
-        ax_upgrades.clear()
-        plot_upgrades_graph(filtered_upgrades, ax_upgrades)
-        canvas_upgrades.draw()
-
-        ax_corr.clear()
-        plot_correlation_graph(filtered_damage, filtered_upgrades, ax_corr)
-        canvas_corr.draw()
+    # Function to update graphs based on session filter
+    def update_graphs(*args):
+        # Summaries are recomputed for the new filter when a tab needs them
+        summaries.clear()
+        for tab in tabs.values():
+            tab['stale'] = True
+        show_current_tab()
 
-    # Bind the update function to the dropdown selection
-    session_var.trace('w', update_graphs)
+    # Bind the update function to the dropdown selection, and to Enter for
+    # typed lists and ranges so partial input is not plotted
+    session_dropdown.bind('<<ComboboxSelected>>', update_graphs)
+    session_dropdown.bind('<Return>', update_graphs)
 
     # Add a button to save all graphs
     def save_all_graphs():
@@ -335,16 +488,15 @@ def create_app():
             os.makedirs('graphs')
 
         # Get the selected session for the filename
-        session = session_var.get()
+        session = session_var.get().strip()
         session_str = session if session != "All Sessions" else "all"
+        session_str = re.sub(r'[^\w.-]+', '_', session_str)
 
         # Save each figure with session info in filename
-        fig_damage.savefig(f'graphs/damage_graph_{session_str}.png')
-        fig_health.savefig(f'graphs/health_graph_{session_str}.png')
-        fig_items.savefig(f'graphs/items_graph_{session_str}.png')
-        fig_skills.savefig(f'graphs/skills_graph_{session_str}.png')
-        fig_upgrades.savefig(f'graphs/upgrades_graph_{session_str}.png')
-        fig_corr.savefig(f'graphs/correlation_graph_{session_str}.png')
+        for name, tab in tabs.items():
+            if tab['stale']:
+                plot_tab(name)
+            tab['fig'].savefig(f'graphs/{name}_graph_{session_str}.png')
 
         # Show confirmation
         messagebox.showinfo("Save Complete",
@@ -354,11 +506,57 @@ def create_app():
                             command=save_all_graphs)
     save_button.pack(side='right', padx=5)
 
+    refresh_button = tk.Button(session_frame, text="Refresh",
+                               command=refresh_data)
+    refresh_button.pack(side='right', padx=5)
+
+    # Function to fold in rows appended while the dashboard is open
+    def poll_live_data():
+        changed = source.poll()
+        if changed:
+            session_dropdown['values'] = ['All Sessions'] + list(
+                source.sessions())
+            for event_type in changed:
+                summaries.pop(event_type, None)
+            current = GRAPH_NAMES[notebook.index('current')]
+            for name, tab in tabs.items():
+                if not changed.intersection(GRAPH_EVENTS[name]):
+                    continue
+                if (name != current or tab['stale'] or tab['fig'] is None
+                        or graph_layout(name, summary) != tab['layout']):
+                    # Hidden tabs are redrawn when shown, new levels or
+                    # names need new artists
+                    tab['stale'] = True
+                    continue
+                # Move the existing artists, then redraw when Tk is idle
+                update_graph(name, summary, tab['ax'])
+                tab['canvas'].draw_idle()
+            show_current_tab()
+        root.after(LIVE_INTERVAL, poll_live_data)
+
+    if live:
+        root.after(LIVE_INTERVAL, poll_live_data)
+
+    # Render the tab that is visible at startup
+    show_current_tab()
+
     return root
 
 
 # Main function
 def main():
+    parser = argparse.ArgumentParser(description="Game data visualization")
+    parser.add_argument('--chunked', action='store_true',
+                        help="aggregate the CSV files in chunks, for "
+                             "histories too big to load into memory")
+    parser.add_argument('--live', action='store_true',
+                        help="keep the graphs updated while a game is "
+                             "being played")
+    parser.add_argument('--frames', action='store_true',
+                        help="load the raw events into memory instead of "
+                             "answering from the per-level rollups")
+    args = parser.parse_args()
+
     # Check if game_data directory exists
     if not os.path.exists('game_data'):
         print("Error: 'game_data' directory not found!")
@@ -367,9 +565,14 @@ def main():
         input("Press Enter to exit...")
         return
 
-    app = create_app()
-    # Adjust figure styles globally
+    # Fold in the shards written by finished sharded sessions
+    merged = compact_shards('game_data')
+    if merged:
+        print(f"Merged {sum(merged.values())} rows from telemetry shards")
+
+    # Adjust figure styles globally, before any figure is created
     plt.style.use('seaborn-v0_8-darkgrid')
+    app = create_app(args.chunked, args.live, args.frames)
     app.mainloop()
 
 
@@ -1,68 +1,65 @@
-import pygame
-from utils.constants import RED, FONT
+import random
+from simulation import rules
+from simulation.rules import EnemyState
+from utils.constants import RED
+from utils.assets import load_image
+from utils.display import render_text
+from utils.render import Blit
 
 
-class Enemy:
+class Enemy(EnemyState):
     def __init__(self, level):
+        # Health and attack power scale with level, see simulation.rules
+        super().__init__(level)
         self.x, self.y = 600, 300
-        self.level = level
-        # Scale health and attack power with level
-        self.hp = 80 + (level - 1) * 20  # More HP per level
-        self.attack_power = 15 + (level - 1) * 8  # More attack per level
 
-        # Load monster image
-        self.image = pygame.image.load('images/monster.png')
-        # Scale the image based on level (bigger for higher levels)
+        # Monster image, scaled based on level (bigger for higher levels)
         size = min(50 + (self.level * 2), 100)  # Cap at size 100
-        self.image = pygame.transform.scale(self.image, (size, size))
-        # Load health icon
-        self.health_icon = pygame.image.load('images/health.png')
-        self.health_icon = pygame.transform.scale(self.health_icon, (20, 20))
+        self.image = load_image('images/monster.png', (size, size))
+        # Health icon
+        self.health_icon = load_image('images/health.png', (20, 20))
 
-        # Every 5 levels, give a bigger boost
-        if level % 5 == 0:
-            self.hp += 50
-            self.attack_power += 15
+    def sprites(self):
+        """What draw() puts on screen, for the dirty-rect renderer."""
+        text = render_text(f"Lvl {self.level} Enemy: {max(0, self.hp)}",
+                           (0, 0, 0))
+        return [
+            # Monster image instead of red rectangle
+            Blit(self.image, (self.x, self.y)),
+            # Level along with HP using health icon
+            Blit(self.health_icon, (self.x - 50, self.y - 30)),
+            Blit(text, (self.x - 30, self.y - 30)),
+        ]
 
     def draw(self, screen):
-        # Draw monster image instead of red rectangle
-        screen.blit(self.image, (self.x, self.y))
-
-        # Display level along with HP using health icon
-        screen.blit(self.health_icon, (self.x - 50, self.y - 30))
-        text = FONT.render(f"Lvl {self.level} Enemy: {max(0, self.hp)}", True,
-                           (0, 0, 0))
-        screen.blit(text, (self.x - 30, self.y - 30))
+        for sprite in self.sprites():
+            sprite.draw(screen)
 
-    def attack(self):
+    def attack(self, rng=random):
         # Randomize attack a bit (80-120% of base power)
-        import random
-        attack_variance = random.uniform(0.8, 1.2)
-        return int(self.attack_power * attack_variance)
+        return rules.enemy_attack(self, rng)
 
 
 class Boss(Enemy):
     def __init__(self, level):
         super().__init__(level)
-        self.hp = int(self.hp * 2)  # Boss has 2× HP
-        self.attack_power = int(
-            self.attack_power * 1.5)  # Boss has 1.5× attack
+        # Boss has 2× HP and 1.5× attack
+        self.hp, self.attack_power = rules.enemy_stats(level, boss=True)
         # Make the boss image larger
         size = min(70 + (self.level * 3), 150)  # Cap at size 150
-        self.image = pygame.transform.scale(self.image, (size, size))
+        self.image = load_image('images/monster.png', (size, size))
 
-    def draw(self, screen):
-        # Draw boss image
-        screen.blit(self.image, (self.x, self.y))
-
-        # Display BOSS label with health icon
-        screen.blit(self.health_icon, (self.x - 70, self.y - 30))
-        text = FONT.render(f"BOSS Lvl {self.level}: {max(0, self.hp)}",
-                           True, (0, 0, 0))
-        screen.blit(text, (self.x - 50, self.y - 30))
+    def sprites(self):
+        text = render_text(f"BOSS Lvl {self.level}: {max(0, self.hp)}",
+                           (0, 0, 0))
+        return [
+            # Boss image
+            Blit(self.image, (self.x, self.y)),
+            # BOSS label with health icon
+            Blit(self.health_icon, (self.x - 70, self.y - 30)),
+            Blit(text, (self.x - 50, self.y - 30)),
+        ]
 
-    def special_attack(self):
+    def special_attack(self, rng=random):
         """Boss special attack can deal heavy damage or status effects."""
-        import random
-        attack_variance = random.uniform(1.5, 2.5)
-        return int(self.attack_power * attack_variance)
\ No newline at end of file
+        return rules.special_attack(self, rng)
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""Monte Carlo balance simulation of the battles, vectorized with NumPy.
+
+``simulate_level`` plays many independent fights of one hero build against
+the enemy of a level at once: every fight's HP is an element of an array,
+each turn is a handful of array operations, and fights that are over drop
+out of the arrays. The rules are the ones of ``simulation.rules``; only the
+order of the random draws differs, so results match ``rules.play_battle``
+in distribution, not fight by fight.
+
+Run ``python -m simulation.montecarlo --levels 1-20`` for a table of win
+probability, turns to kill and HP left per level.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from simulation import rules
+
+# Action codes of the policies' arrays, in the order of rules.ACTIONS
+MAGIC, STRENGTH, DEFEND, HEAL = range(len(rules.ACTIONS))
+
+# Fight outcomes in the results
+UNDECIDED, WON, LOST = 0, 1, -1
+
+# Turns after which a fight is given up as undecided
+MAX_TURNS = 200
+
+
+def always(action):
+    """Policy playing the same action every turn."""
+    code = rules.ACTIONS.index(action)
+
+    def policy(hero, hero_hp, enemy_hp):
+        return np.full(len(hero_hp), code, dtype=np.int8)
+    return policy
+
+
+def best_attack(hero, hero_hp, enemy_hp):
+    """Policy always using the hero's strongest attack."""
+    code = (MAGIC if rules.magic_power(hero) >= rules.attack_power(hero)
+            else STRENGTH)
+    return np.full(len(hero_hp), code, dtype=np.int8)
+
+
+def heal_below(fraction):
+    """Policy healing under ``fraction`` of max HP, attacking otherwise."""
+    def policy(hero, hero_hp, enemy_hp):
+        actions = best_attack(hero, hero_hp, enemy_hp)
+        actions[hero_hp < fraction * hero.max_hp] = HEAL
+        return actions
+    return policy
+
+
+def simulate_level(hero, level, fights, policy=best_attack, rng=None,
+                   boss=False, enemy_stats=rules.enemy_stats,
+                   variance=rules.ATTACK_VARIANCE, max_turns=MAX_TURNS):
+    """Play many fights of a hero build against the enemy of a level.
+
+    Args:
+        hero: HeroState every fight starts from; left unchanged
+        level: Level of the enemy
+        fights: Number of fights
+        policy: Called with (hero, hero_hp, enemy_hp) arrays of the fights
+            still going, returns their action codes
+        rng: numpy Generator, or a seed for one
+        boss: Fight the level's boss instead
+        enemy_stats: Function of (level, boss) giving (hp, attack_power),
+            to try other enemy scaling
+        variance: (low, high) fraction of attack power an enemy hit does
+        max_turns: Turns after which a fight is given up
+
+    Returns:
+        Dict of per-fight arrays: "outcome" (WON, LOST or UNDECIDED),
+        "turns", "hero_hp" and "enemy_hp" at the end of the fight
+    """
+    rng = np.random.default_rng(rng)
+    enemy_max_hp, attack_power = enemy_stats(level, boss)
+    low, high = variance
+    damage = np.array([rules.magic_power(hero), rules.attack_power(hero), 0,
+                       0], dtype=np.int32)
+    block = hero.strength_level * 2
+    heal_amount = hero.magic_level * 10
+
+    outcome = np.full(fights, UNDECIDED, dtype=np.int8)
+    turns = np.full(fights, max_turns, dtype=np.int32)
+    final_hero_hp = np.empty(fights, dtype=np.int32)
+    final_enemy_hp = np.empty(fights, dtype=np.int32)
+
+    # Fights still going, and their HP
+    active = np.arange(fights)
+    hero_hp = np.full(fights, hero.hp, dtype=np.int32)
+    enemy_hp = np.full(fights, enemy_max_hp, dtype=np.int32)
+
+    for turn in range(1, max_turns + 1):
+        count = len(active)
+        actions = policy(hero, hero_hp, enemy_hp)
+        enemy_hp -= damage[actions]
+
+        defending = actions == DEFEND
+        if defending.any():
+            hits = (attack_power * rng.uniform(low, high, count)).astype(
+                np.int32)
+            hero_hp -= np.where(defending, np.maximum(0, hits - block), 0)
+        healing = actions == HEAL
+        if healing.any():
+            hero_hp = np.where(healing,
+                               np.minimum(hero.max_hp, hero_hp + heal_amount),
+                               hero_hp)
+
+        # The enemy answers a heal, and any other action it survived
+        answered = healing | ((enemy_hp > 0) & (hero_hp > 0))
+        answered &= rng.random(count) >= hero.speed
+        hits = (attack_power * rng.uniform(low, high, count)).astype(np.int32)
+        hero_hp -= np.where(answered, hits, 0)
+
+        lost = hero_hp <= 0
+        done = lost | (enemy_hp <= 0)
+        if done.any():
+            ended = active[done]
+            outcome[ended] = np.where(lost[done], LOST, WON)
+            turns[ended] = turn
+            final_hero_hp[ended] = hero_hp[done]
+            final_enemy_hp[ended] = enemy_hp[done]
+            going = ~done
+            active = active[going]
+            hero_hp = hero_hp[going]
+            enemy_hp = enemy_hp[going]
+            if not len(active):
+                break
+
+    final_hero_hp[active] = hero_hp
+    final_enemy_hp[active] = enemy_hp
+    return {'outcome': outcome, 'turns': turns, 'hero_hp': final_hero_hp,
+            'enemy_hp': final_enemy_hp}
+
+
+def summarize(results):
+    """Win probability, and turns and HP left of the fights won.
+
+    Returns:
+        Dict of the summary values; percentiles are NaN without wins
+    """
+    won = results['outcome'] == WON
+    summary = {'fights': len(won), 'win_rate': won.mean(),
+               'undecided': (results['outcome'] == UNDECIDED).mean()}
+    for key, values in (('turns', results['turns'][won]),
+                        ('hp_left', results['hero_hp'][won])):
+        if len(values):
+            p10, p50, p90 = np.percentile(values, [10, 50, 90])
+            mean = values.mean()
+        else:
+            p10 = p50 = p90 = mean = np.nan
+        summary.update({f'{key}_mean': mean, f'{key}_p10': p10,
+                        f'{key}_p50': p50, f'{key}_p90': p90})
+    return summary
+
+
+def balance_table(hero, levels, fights, policy=best_attack, seed=None,
+                  **kwargs):
+    """Summary of ``simulate_level`` for each level, one row per level.
+
+    Extra keyword arguments are passed to simulate_level.
+    """
+    rng = np.random.default_rng(seed)
+    rows = {level: summarize(simulate_level(hero, level, fights, policy, rng,
+                                            **kwargs))
+            for level in levels}
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'level'
+    return table
+
+
+def parse_levels(text):
+    """Levels from e.g. "1-20" or "1,5,10"."""
+    levels = []
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        levels.extend(range(int(first), int(last or first) + 1))
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate fights of a hero build against each level.")
+    parser.add_argument('--levels', default='1-20', help='e.g. 1-20 or 1,5')
+    parser.add_argument('--fights', type=int, default=100000,
+                        help='fights per level')
+    parser.add_argument('--hp', type=int, default=100)
+    parser.add_argument('--strength', type=int, default=3)
+    parser.add_argument('--magic', type=int, default=3)
+    parser.add_argument('--speed', type=float, default=0.1)
+    parser.add_argument('--heal-below', type=float,
+                        help='heal under this fraction of max HP')
+    parser.add_argument('--boss', action='store_true',
+                        help='fight the bosses of the levels')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    hero = rules.HeroState(hp=args.hp, max_hp=args.hp,
+                           magic_level=args.magic,
+                           strength_level=args.strength, speed=args.speed)
+    policy = (best_attack if args.heal_below is None
+              else heal_below(args.heal_below))
+    levels = parse_levels(args.levels)
+
+    start = time.perf_counter()
+    table = balance_table(hero, levels, args.fights, policy, args.seed,
+                          boss=args.boss)
+    elapsed = time.perf_counter() - start
+
+    columns = ['win_rate', 'turns_p50', 'turns_p90', 'hp_left_p10',
+               'hp_left_p50', 'hp_left_p90']
+    print(table[columns].round(3).to_string())
+    total = args.fights * len(levels)
+    print(f"\n{total} fights in {elapsed:.2f} s: "
+          f"{total / elapsed:,.0f} fights per second")
+
+
+if __name__ == '__main__':
+    main()
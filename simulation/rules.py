@@ -0,0 +1,259 @@
+"""Combat rules of the game, without any drawing.
+
+Heroes and enemies are small ``__slots__`` state objects and a battle turn
+is a plain function over them, so battles can be played out in
+microseconds, e.g. to simulate many runs. ``models.Hero`` and
+``models.Enemy`` extend these states with their images, and
+``game.battle.Battle`` only shows what ``play_turn`` decided.
+
+Random draws are made through ``rng``, any object with ``random()`` and
+``uniform()`` such as the ``random`` module (the default) or a
+``random.Random`` instance, in the same order the game always made them.
+"""
+import random
+
+# Hero actions, named as on the battle buttons and in the telemetry
+MAGIC_ATTACK = "Magic Attack"
+STRENGTH_ATTACK = "Strength Attack"
+DEFEND = "Defend"
+HEAL = "Heal"
+ACTIONS = (MAGIC_ATTACK, STRENGTH_ATTACK, DEFEND, HEAL)
+
+# Battle outcomes
+WON = "won"
+LOST = "lost"
+
+# Damage of an enemy attack, as a fraction of its attack power
+ATTACK_VARIANCE = (0.8, 1.2)
+
+# Damage of a boss's special attack, as a fraction of its attack power
+SPECIAL_VARIANCE = (1.5, 2.5)
+
+# Upgrades offered after each victory, named as in the telemetry
+STRENGTH = "Strength"
+MAGIC = "Magic"
+SPEED = "Speed"
+HEALTH = "Health"
+UPGRADES = (STRENGTH, MAGIC, SPEED, HEALTH)
+
+# Shop items and their prices in coins
+POTION = "Potion (+25 HP)"
+SWORD = "Sword (+10 ATK)"
+WAND = "Wand (+10 Magic)"
+ITEM_COSTS = {POTION: 15, SWORD: 20, WAND: 20}
+
+# Coins for choosing an upgrade, and for moving on to the next level
+UPGRADE_COINS = 10
+LEVEL_COINS = 20
+
+
+class HeroState:
+    __slots__ = ('hp', 'max_hp', 'magic_level', 'strength_level', 'speed',
+                 'coins')
+
+    def __init__(self, hp=100, max_hp=100, magic_level=3, strength_level=3,
+                 speed=0.1, coins=0):
+        """The hero's stats at the start of a new game, by default."""
+        self.hp = hp
+        self.max_hp = max_hp
+        self.magic_level = magic_level
+        self.strength_level = strength_level
+        # Chance of dodging an enemy attack
+        self.speed = speed
+        self.coins = coins
+
+
+def enemy_stats(level, boss=False):
+    """HP and attack power of the enemy of a level.
+
+    Returns:
+        Tuple of (hp, attack_power)
+    """
+    # More HP and attack per level
+    hp = 80 + (level - 1) * 20
+    attack_power = 15 + (level - 1) * 8
+    # Every 5 levels, give a bigger boost
+    if level % 5 == 0:
+        hp += 50
+        attack_power += 15
+    if boss:
+        # Boss has 2× HP and 1.5× attack
+        hp = int(hp * 2)
+        attack_power = int(attack_power * 1.5)
+    return hp, attack_power
+
+
+class EnemyState:
+    __slots__ = ('level', 'hp', 'attack_power')
+
+    def __init__(self, level, boss=False):
+        self.level = level
+        self.hp, self.attack_power = enemy_stats(level, boss)
+
+
+def magic_power(hero):
+    return hero.magic_level * 10
+
+
+def attack_power(hero):
+    return hero.strength_level * 10
+
+
+def defend(hero, enemy_damage):
+    """Damage left of an enemy attack the hero defends against."""
+    return max(0, enemy_damage - (hero.strength_level * 2))
+
+
+def heal(hero):
+    """Heal the hero, up to their max HP.
+
+    Returns:
+        HP actually healed
+    """
+    previous_hp = hero.hp
+    hero.hp = min(hero.max_hp, hero.hp + hero.magic_level * 10)
+    return hero.hp - previous_hp
+
+
+def dodge(hero, rng=random):
+    """Whether the hero dodges the next enemy attack."""
+    return rng.random() < hero.speed
+
+
+def enemy_attack(enemy, rng=random):
+    """Damage of one enemy attack, 80-120% of its attack power."""
+    return int(enemy.attack_power * rng.uniform(*ATTACK_VARIANCE))
+
+
+def special_attack(enemy, rng=random):
+    """Damage of a boss's special attack, 150-250% of its attack power."""
+    return int(enemy.attack_power * rng.uniform(*SPECIAL_VARIANCE))
+
+
+def outcome(hero, enemy):
+    """WON, LOST, or None while the battle goes on."""
+    if hero.hp <= 0:
+        return LOST
+    if enemy.hp <= 0:
+        return WON
+    return None
+
+
+class Turn:
+    __slots__ = ('action', 'effect', 'counter', 'outcome')
+
+    def __init__(self, action, effect, counter, outcome):
+        """What happened in one battle turn.
+
+        Args:
+            action: Hero action, one of ACTIONS
+            effect: Damage dealt by an attack, damage taken while defending,
+                or HP healed
+            counter: Damage of the enemy's answer, or None if there was none
+                or the hero dodged it
+            outcome: Battle outcome after the turn
+        """
+        self.action = action
+        self.effect = effect
+        self.counter = counter
+        self.outcome = outcome
+
+
+def play_turn(hero, enemy, action, rng=random):
+    """Play the hero's action and the enemy's answer.
+
+    Attacks hit the enemy, then the enemy strikes back unless one of them
+    is down or the hero dodges. Defending takes a reduced hit first, then
+    the enemy strikes back as after an attack. Healing is answered by an
+    enemy attack unless the hero dodges.
+
+    Returns:
+        Turn describing what happened
+    """
+    if action == MAGIC_ATTACK or action == STRENGTH_ATTACK:
+        effect = (magic_power(hero) if action == MAGIC_ATTACK
+                  else attack_power(hero))
+        enemy.hp -= effect
+    elif action == DEFEND:
+        effect = defend(hero, enemy_attack(enemy, rng))
+        hero.hp -= effect
+    elif action == HEAL:
+        effect = heal(hero)
+    else:
+        raise ValueError(f"Unknown action: {action!r}")
+
+    counter = None
+    if action == HEAL:
+        if not dodge(hero, rng):
+            counter = enemy_attack(enemy, rng)
+    elif enemy.hp > 0 and hero.hp > 0 and not dodge(hero, rng):
+        counter = enemy_attack(enemy, rng)
+    if counter is not None:
+        hero.hp -= counter
+    return Turn(action, effect, counter, outcome(hero, enemy))
+
+
+def play_battle(hero, enemy, choose_action, rng=random, max_turns=1000):
+    """Play turns until the battle is won or lost.
+
+    Args:
+        hero: HeroState, changed in place
+        enemy: EnemyState, changed in place
+        choose_action: Called with (hero, enemy) to pick each turn's action
+        rng: Source of the random draws
+        max_turns: Turns after which the battle is given up
+
+    Returns:
+        Tuple of (outcome, number of turns played); the outcome is None if
+        the battle was given up
+    """
+    for turns in range(1, max_turns + 1):
+        turn = play_turn(hero, enemy, choose_action(hero, enemy), rng)
+        if turn.outcome is not None:
+            return turn.outcome, turns
+    return None, max_turns
+
+
+def upgrade(hero, choice):
+    """Apply an upgrade chosen after a victory, and pay its coins.
+
+    Returns:
+        New value of the upgraded stat
+    """
+    if choice == STRENGTH:
+        hero.strength_level += 1
+        value = hero.strength_level
+    elif choice == MAGIC:
+        hero.magic_level += 1
+        value = hero.magic_level
+    elif choice == SPEED:
+        hero.speed += 0.1
+        value = hero.speed
+    elif choice == HEALTH:
+        hero.max_hp += 50
+        hero.hp += 50
+        value = hero.max_hp
+    else:
+        raise ValueError(f"Unknown upgrade: {choice!r}")
+    # Give coins after any upgrade
+    hero.coins += UPGRADE_COINS
+    return value
+
+
+def buy(hero, item):
+    """Buy a shop item if the hero has the coins for it.
+
+    Returns:
+        Whether the item was bought
+    """
+    cost = ITEM_COSTS[item]
+    if hero.coins < cost:
+        return False
+    hero.coins -= cost
+    if item == POTION:
+        hero.hp = min(hero.max_hp, hero.hp + 25)
+    elif item == SWORD:
+        hero.strength_level += 1
+    else:
+        hero.magic_level += 1
+    return True
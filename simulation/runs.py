@@ -0,0 +1,246 @@
+"""Whole-run simulations, from level 1 until the hero falls.
+
+A run plays the game's loop with ``simulation.rules``: shop, battle,
+upgrade, next level, with a strategy making the choices. Runs are spread
+over a process pool in fixed chunks, and each run draws from its own
+random stream, spawned from the seed and the run's number with
+``numpy.random.SeedSequence``. The results for a seed are therefore the
+same, bit for bit, whatever the number of processes.
+
+Run ``python -m simulation.runs --runs 100000 --seed 1`` for the
+distribution of the levels reached.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simulation import rules
+from simulation import solver
+
+# Level at which a run is stopped if the hero is still standing
+MAX_LEVEL = 100
+
+# Runs handed to a worker process at a time
+CHUNK_SIZE = 500
+
+# Columns of the results, one row per run
+RUN_COLUMNS = ['level', 'turns', 'max_hp', 'strength', 'magic', 'speed',
+               'coins']
+
+
+def run_rng(seed, run):
+    """Random stream of one run, the same in whichever process plays it.
+
+    Args:
+        seed: Seed of the whole simulation (an int)
+        run: Number of the run
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(run,)).generate_state(4)
+    return random.Random(int.from_bytes(state.tobytes(), 'little'))
+
+
+class GreedyStrategy:
+    """Attack with the strongest stat, heal when low, buy potions first."""
+    heal_below = 0.3
+
+    def action(self, hero, enemy, rng):
+        if hero.hp < self.heal_below * hero.max_hp:
+            return rules.HEAL
+        if rules.magic_power(hero) >= rules.attack_power(hero):
+            return rules.MAGIC_ATTACK
+        return rules.STRENGTH_ATTACK
+
+    def upgrade(self, hero, level, rng):
+        if hero.hp < hero.max_hp // 2:
+            return rules.HEALTH
+        if hero.magic_level >= hero.strength_level:
+            return rules.MAGIC
+        return rules.STRENGTH
+
+    def purchase(self, hero, level, rng):
+        """Next item to buy before the level's battle, or None."""
+        if hero.max_hp - hero.hp >= 25:
+            return rules.POTION
+        return rules.WAND if hero.magic_level >= hero.strength_level \
+            else rules.SWORD
+
+
+class RandomStrategy:
+    """Every choice made at random, e.g. to explore builds."""
+
+    def action(self, hero, enemy, rng):
+        return rng.choice(rules.ACTIONS)
+
+    def upgrade(self, hero, level, rng):
+        return rng.choice(rules.UPGRADES)
+
+    def purchase(self, hero, level, rng):
+        choice = rng.randrange(len(rules.ITEM_COSTS) + 1)
+        # None, the choice of leaving the shop, is as likely as each item
+        return list(rules.ITEM_COSTS)[choice - 1] if choice else None
+
+
+class OptimalStrategy:
+    """The choices of simulation.solver, planned up to the runs' max level.
+
+    Above the max level every choice looks the same to the solver, so runs
+    must stop there.
+    """
+    # Solvers by max level, built once per process and shared by every run
+    # it plays
+    solvers = {}
+
+    def __init__(self, max_level=solver.MAX_LEVEL):
+        if max_level not in self.solvers:
+            self.solvers[max_level] = solver.Solver(max_level)
+        self.solver = self.solvers[max_level]
+
+    def action(self, hero, enemy, rng):
+        if self.solver.should_heal(hero, enemy, enemy.level):
+            return rules.HEAL
+        if rules.magic_power(hero) >= rules.attack_power(hero):
+            return rules.MAGIC_ATTACK
+        return rules.STRENGTH_ATTACK
+
+    def upgrade(self, hero, level, rng):
+        return self.solver.best_upgrade(hero, level)
+
+    def purchase(self, hero, level, rng):
+        return self.solver.best_purchase(hero, level)
+
+
+STRATEGIES = {'greedy': GreedyStrategy, 'random': RandomStrategy,
+              'optimal': OptimalStrategy}
+
+
+def default_max_level(strategy):
+    """Level at which runs of a strategy stop unless told otherwise.
+
+    Solving far ahead is slow, so the optimal strategy stops where the
+    solver does by default.
+    """
+    return solver.MAX_LEVEL if strategy == 'optimal' else MAX_LEVEL
+
+
+def play_run(strategy, rng, max_level=MAX_LEVEL):
+    """Play one run until the hero falls or reaches ``max_level``.
+
+    Args:
+        strategy: Object with action(), upgrade() and purchase() choices
+        rng: Random stream of the run
+
+    Returns:
+        Tuple of the run's values, in the order of RUN_COLUMNS
+    """
+    def choose_action(hero, enemy):
+        return strategy.action(hero, enemy, rng)
+
+    hero = rules.HeroState()
+    level = 1
+    turns = 0
+    while level < max_level:
+        # Shop before the level's battle
+        item = strategy.purchase(hero, level, rng)
+        while item is not None and rules.buy(hero, item):
+            item = strategy.purchase(hero, level, rng)
+
+        outcome, played = rules.play_battle(
+            hero, rules.EnemyState(level), choose_action, rng)
+        turns += played
+        if outcome != rules.WON:
+            break
+
+        rules.upgrade(hero, strategy.upgrade(hero, level, rng))
+        hero.coins += rules.LEVEL_COINS
+        level += 1
+    return (level, turns, hero.max_hp, hero.strength_level,
+            hero.magic_level, hero.speed, hero.coins)
+
+
+def play_chunk(seed, strategy_name, first, last, max_level=MAX_LEVEL):
+    """Play runs ``first`` to ``last - 1``, e.g. in a worker process."""
+    if STRATEGIES[strategy_name] is OptimalStrategy:
+        # The solver plans up to where the runs stop
+        strategy = OptimalStrategy(max_level)
+    else:
+        strategy = STRATEGIES[strategy_name]()
+    return [play_run(strategy, run_rng(seed, run), max_level)
+            for run in range(first, last)]
+
+
+def simulate_runs(runs, seed, strategy='greedy', jobs=None,
+                  max_level=None):
+    """Play many runs over a process pool.
+
+    Args:
+        runs: Number of runs
+        seed: Seed of the simulation; the same seed gives the same results
+            for any number of jobs
+        strategy: Name of the strategy in STRATEGIES
+        jobs: Worker processes, None for one per CPU, or 1 to play in this
+            process
+        max_level: Level at which runs are stopped, None for the
+            strategy's default_max_level
+
+    Returns:
+        DataFrame with one row per run, in run order
+    """
+    if max_level is None:
+        max_level = default_max_level(strategy)
+    chunks = [(first, min(first + CHUNK_SIZE, runs))
+              for first in range(0, runs, CHUNK_SIZE)]
+    args = [(seed, strategy, first, last, max_level)
+            for first, last in chunks]
+    if jobs == 1:
+        results = [play_chunk(*chunk_args) for chunk_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            # map keeps the chunks in order whichever worker finishes first
+            results = list(pool.map(play_chunk, *zip(*args)))
+    rows = [row for chunk in results for row in chunk]
+    return pd.DataFrame(rows, columns=RUN_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate whole runs and report the levels reached.")
+    parser.add_argument('--runs', type=int, default=100000)
+    parser.add_argument('--seed', type=int,
+                        help='seed of the runs (default: a new one, printed)')
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES),
+                        default='greedy')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--max-level', type=int,
+                        help=f'level at which runs stop (default: '
+                             f'{MAX_LEVEL}, or {solver.MAX_LEVEL} for the '
+                             f'optimal strategy)')
+    args = parser.parse_args()
+
+    seed = args.seed
+    if seed is None:
+        # Picked here so every worker gets the same one
+        seed = np.random.SeedSequence().entropy
+        print(f"Seed: {seed}")
+
+    start = time.perf_counter()
+    results = simulate_runs(args.runs, seed, args.strategy, args.jobs,
+                            args.max_level)
+    elapsed = time.perf_counter() - start
+
+    levels = results['level']
+    print(f"Level reached: mean {levels.mean():.2f}, "
+          f"median {levels.median():.0f}, best {levels.max()}")
+    print((levels.value_counts(normalize=True).sort_index()
+           .round(4).to_string()))
+    print(f"\n{args.runs} runs on {args.jobs or os.cpu_count()} processes "
+          f"in {elapsed:.2f} s: {args.runs / elapsed:,.0f} runs per second")
+
+
+if __name__ == '__main__':
+    main()
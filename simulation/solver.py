@@ -0,0 +1,515 @@
+"""Upgrade and shop choices that maximize the expected level reached.
+
+The solver is an expectimax over the states of a run: the hero's stats,
+coins and HP at each level. The hero chooses between shopping and
+fighting, in battle between attacking and healing, and after a win
+between the upgrades, and chance decides the enemy's hits and the dodges.
+The value of a state is the expected level at which the hero falls,
+capped at ``max_level`` as in ``simulation.runs``.
+
+Values are computed for every HP at once, as a vector over HP in steps of
+``hp_step`` (enemy hits are rounded to the step; a step of 1 is exact),
+for each state of stats and coins. A level's values only depend on the
+next level's, so the solve goes bottom-up. A forward pass finds the
+states reachable at each level, keyed so that every path to the same
+state shares one entry. Then the levels are solved from the last back to
+the first, with the values of only two levels in memory at once. Choices
+whose resulting state is no better in any way than another choice's are
+pruned in the forward pass, so their states are never solved. Of the
+solved levels only the policy is kept: the best purchase, upgrade and
+heal-or-attack choice at every HP, one byte each.
+
+Two simplifications: the hero never defends, since attacking leaves them
+with as much HP and the enemy with less, and a battle is never given up
+after ``max_turns`` the way ``rules.play_battle`` does.
+
+Run ``python -m simulation.solver`` for the expected level of the best
+play and the choices along the way.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from simulation import rules
+
+# Level at which a run counts as finished, as in simulation.runs
+MAX_LEVEL = 15
+
+# HP resolution of the values; must divide 5, the step of every heal
+HP_STEP = 5
+
+# Purchase choices by their code in the policy, 0 being to fight
+PURCHASES = (None,) + tuple(rules.ITEM_COSTS)
+
+# Values this close are treated as equal
+TOLERANCE = 1e-9
+
+
+def _copy(hero):
+    return rules.HeroState(hero.hp, hero.max_hp, hero.magic_level,
+                           hero.strength_level, hero.speed, hero.coins)
+
+
+def _state_key(hero):
+    return (hero.strength_level, hero.magic_level, round(hero.speed, 6),
+            hero.max_hp, hero.coins)
+
+
+def dominates(a, b):
+    """Whether hero ``a`` is at least as well off as ``b``, HP aside.
+
+    Magic raises both the attack and the heal, so ``a`` is also at least
+    as well off when its magic matches ``b``'s best attack stat: every
+    strength point ``b`` gets later, ``a`` can get as magic instead.
+    """
+    return (a.speed >= b.speed and a.max_hp >= b.max_hp
+            and a.coins >= b.coins
+            and (a.magic_level >= max(b.strength_level, b.magic_level)
+                 or (a.strength_level >= b.strength_level
+                     and a.magic_level >= b.magic_level)))
+
+
+class Solver:
+    def __init__(self, max_level=MAX_LEVEL, hp_step=HP_STEP,
+                 enemy_stats=rules.enemy_stats,
+                 variance=rules.ATTACK_VARIANCE):
+        """Expectimax solver of the upgrade, shop and battle choices.
+
+        Args:
+            max_level: Level at which a run counts as finished
+            hp_step: HP resolution of the values (1 or 5)
+            enemy_stats: Function of (level, boss) giving (hp,
+                attack_power), to try other enemy scaling
+            variance: (low, high) fraction of attack power an enemy hit does
+        """
+        if 5 % hp_step:
+            raise ValueError("hp_step must divide 5")
+        self.max_level = max_level
+        self.hp_step = hp_step
+        self.enemy_stats = enemy_stats
+        self.variance = variance
+        self.stats = {'states': 0, 'pruned': 0, 'most_values': 0}
+        # Policy by level and state key: codes of the best purchase and
+        # upgrade at every HP index, and the heal sets of the battle
+        self.purchases = {}
+        self.upgrades = {}
+        self.heals = {}
+        # Level and state key the last solve started from, and its values
+        self.origin = None
+        self.origin_values = None
+        # HP maps and hit matrices, kept for one level at a time
+        self._hit_matrices = {}
+        self._hp_maps = {}
+
+    # Building blocks
+
+    def _size(self, hero):
+        # Entries of a value vector, index i standing for HP i * hp_step
+        return hero.max_hp // self.hp_step + 1
+
+    def _after(self, hero, apply, choice):
+        """The hero after a choice, and where each HP index ends up.
+
+        The rules are applied to a hero at every HP of the grid, so the
+        solver follows simulation.rules whatever the choice does. Where HP
+        ends up is assumed to depend on the HP and max HP only.
+
+        Returns:
+            Tuple of (hero at max HP after the choice, index array), or
+            None if the choice is not possible
+        """
+        template = _copy(hero)
+        template.hp = hero.max_hp
+        if apply(template, choice) is False:
+            return None
+        key = (apply.__name__, choice, hero.max_hp)
+        indexes = self._hp_maps.get(key)
+        if indexes is None:
+            indexes = np.zeros(self._size(hero), dtype=np.intp)
+            for i in range(1, len(indexes)):
+                copy = _copy(hero)
+                copy.hp = i * self.hp_step
+                apply(copy, choice)
+                indexes[i] = copy.hp // self.hp_step
+            self._hp_maps[key] = indexes
+        return template, indexes
+
+    def _prune(self, options):
+        """Drop options whose hero is dominated by another option's.
+
+        Returns:
+            The options left, each with a boolean array of the HP indexes
+            at which another option is at least as good all the same, so
+            that ties do not go to a choice that only wastes coins
+        """
+        kept = []
+        for i, (choice, hero, indexes) in enumerate(options):
+            dominated = np.zeros(len(indexes), dtype=bool)
+            pruned = False
+            for j, (_, other, other_indexes) in enumerate(options):
+                if j == i or not dominates(other, hero):
+                    continue
+                at_least = other_indexes >= indexes
+                if j > i and dominates(hero, other):
+                    at_least = other_indexes > indexes
+                dominated |= at_least
+                pruned |= bool(np.all(other_indexes >= indexes)
+                               and (j < i or not dominates(hero, other)
+                                    or np.any(other_indexes > indexes)))
+            if pruned:
+                self.stats['pruned'] += 1
+            else:
+                kept.append((choice, hero, indexes, dominated))
+        return kept
+
+    def _shop_options(self, hero):
+        """Shop choices left after pruning, as in _prune, by their code in
+        PURCHASES."""
+        options = [(0, hero, np.arange(self._size(hero)))]
+        for code, item in enumerate(PURCHASES[1:], 1):
+            after = self._after(hero, rules.buy, item)
+            if after is not None:
+                options.append((code,) + after)
+        return self._prune(options)
+
+    def _upgrade_options(self, hero):
+        """Upgrades left after pruning, as in _prune, by their code in
+        rules.UPGRADES, with the hero at the start of the next level."""
+        options = []
+        for code, choice in enumerate(rules.UPGRADES):
+            after, indexes = self._after(hero, rules.upgrade, choice)
+            after.coins += rules.LEVEL_COINS
+            options.append((code, after, indexes))
+        return self._prune(options)
+
+    def _hit_matrix(self, level, speed, size):
+        """Values after an enemy attack, as ``matrix @ values + lost``.
+
+        Returns:
+            Tuple of (matrix, lost): transition probabilities between HP
+            indexes, and the value of falling weighted by its probability
+        """
+        key = (level, speed, size)
+        if key not in self._hit_matrices:
+            _, attack_power = self.enemy_stats(level, False)
+            low, high = self.variance
+            hit = 1 - min(1.0, speed)
+            matrix = np.zeros((size, size))
+            lost = np.zeros(size)
+            hp = np.arange(1, size)
+            for damage in range(int(attack_power * low),
+                                int(attack_power * high) + 1):
+                # Share of the uniform draws giving this damage
+                start = max(low, damage / attack_power)
+                end = min(high, (damage + 1) / attack_power)
+                if end <= start:
+                    continue
+                chance = hit * (end - start) / (high - low)
+                target = hp - int(damage / self.hp_step + 0.5)
+                alive = target >= 1
+                matrix[hp[alive], target[alive]] += chance
+                lost[hp[~alive]] += chance
+            matrix[hp, hp] += 1 - hit
+            self._hit_matrices[key] = (matrix, lost * level)
+        return self._hit_matrices[key]
+
+    def _healed(self, hero):
+        """Where each HP index ends up when the hero heals."""
+        key = (rules.heal.__name__, hero.magic_level, hero.max_hp)
+        healed = self._hp_maps.get(key)
+        if healed is None:
+            healer = _copy(hero)
+            healed = np.zeros(self._size(hero), dtype=np.intp)
+            for i in range(1, len(healed)):
+                healer.hp = i * self.hp_step
+                rules.heal(healer)
+                healed[i] = healer.hp // self.hp_step
+            self._hp_maps[key] = healed
+        return healed
+
+    @staticmethod
+    def _best(options):
+        """Best of (code, values, dominated) options at every HP index.
+
+        The choice at an HP index is among the options not dominated there,
+        ties going to the first, so the order of ``options`` is the order
+        of preference.
+
+        Returns:
+            Tuple of (values, codes of the best options)
+        """
+        values = np.max([option for _, option, _ in options], axis=0)
+        best = np.full(len(values), -np.inf)
+        codes = np.zeros(len(values), dtype=np.int8)
+        for code, option, dominated in options:
+            better = ~dominated & (option > best + TOLERANCE)
+            best[better] = option[better]
+            codes[better] = code
+        return values, codes
+
+    # The solve
+
+    def _reachable(self, hero, level):
+        """States the hero can shop in at each level, from ``level`` on.
+
+        Returns:
+            List of one dict per level below max_level, from state key to
+            (hero, shop options, upgrade options). Options are as in _prune
+            with the key of the state after instead of its hero; the
+            upgrade options are empty when fighting was pruned.
+        """
+        levels = []
+        entering = [hero]
+        while level < self.max_level:
+            graph = {}
+            while entering:
+                shop = entering.pop()
+                key = _state_key(shop)
+                if key in graph:
+                    continue
+                shop_options = []
+                for code, after, indexes, dominated in self._shop_options(
+                        shop):
+                    shop_options.append(
+                        (code, _state_key(after), indexes, dominated))
+                    if code:
+                        entering.append(after)
+                graph[key] = (shop, shop_options, [])
+
+            # The states of the next level, after winning this one
+            for shop, shop_options, upgrade_options in graph.values():
+                if shop_options[0][0] != 0:
+                    continue
+                for code, after, indexes, dominated in self._upgrade_options(
+                        shop):
+                    upgrade_options.append(
+                        (code, _state_key(after), indexes, dominated))
+                    entering.append(after)
+            self.stats['states'] += len(graph)
+            levels.append(graph)
+            self._hp_maps.clear()
+            level += 1
+        return levels
+
+    def _fight_values(self, hero, level, won):
+        """Values of fighting the level's enemy, and when to heal.
+
+        Args:
+            won: Values after winning the battle
+
+        Returns:
+            Tuple of (values, heal): heal[k][i] tells whether to heal at HP
+            index i after k attacks on the enemy
+        """
+        size = self._size(hero)
+        matrix, lost = self._hit_matrix(level, hero.speed, size)
+
+        # The hero's best attack; healing moves each HP index up
+        power = max(rules.magic_power(hero), rules.attack_power(hero))
+        enemy_hp, _ = self.enemy_stats(level, False)
+        attacks = math.ceil(enemy_hp / power)
+        healed = self._healed(hero)
+        heal_matrix = matrix[healed]
+        heal_lost = lost[healed]
+
+        # From the last attack back to the first
+        heal_sets = []
+        values = won
+        for k in range(attacks - 1, -1, -1):
+            if k == attacks - 1:
+                attack = won.copy()
+            else:
+                attack = matrix @ values + lost
+            attack[0] = level
+            values, heal = self._battle_stage(attack, heal_matrix, heal_lost)
+            heal_sets.append(heal)
+        heal_sets.reverse()
+        return values, heal_sets
+
+    def _battle_stage(self, attack, heal_matrix, heal_lost):
+        """Best of attacking and healing at every HP, by policy iteration.
+
+        Healing does not bring the battle closer to its end, so the values
+        of the HP indexes that heal depend on each other and are solved for
+        together.
+        """
+        heal = np.zeros(len(attack), dtype=bool)
+        values = attack
+        for _ in range(len(attack)):
+            healing = heal_matrix @ values + heal_lost
+            better = healing > values + TOLERANCE
+            better |= heal & (healing >= values - TOLERANCE)
+            better[0] = False
+            if np.array_equal(better, heal):
+                break
+            heal = better
+            values = attack.copy()
+            states = np.flatnonzero(heal)
+            if len(states):
+                system = (np.eye(len(states))
+                          - heal_matrix[np.ix_(states, states)])
+                known = (heal_matrix[states][:, ~heal] @ attack[~heal]
+                         + heal_lost[states])
+                values[states] = np.linalg.solve(system, known)
+        return values, heal
+
+    def _next_values(self, later, level, key, indexes):
+        """Values at the start of ``level`` + 1, by HP index of ``level``."""
+        if level + 1 >= self.max_level:
+            # The run is over: at the cap, or at the next level if fallen
+            return np.where(indexes == 0, float(level + 1),
+                            float(self.max_level))
+        return later[key][indexes]
+
+    def solve(self, hero=None, level=1):
+        """Solve every state reachable from the hero's at a level's start.
+
+        Args:
+            hero: HeroState to start from, a new game's by default
+            level: Level whose shop the hero is in
+
+        Returns:
+            Expected level reached from the hero's state, at every HP index
+        """
+        hero = rules.HeroState() if hero is None else _copy(hero)
+        hero.hp = hero.max_hp
+        first = level
+        levels = self._reachable(hero, first)
+
+        # Shop values of the level after the one being solved
+        later = {}
+        while levels:
+            level = first + len(levels) - 1
+            graph = levels.pop()
+            values = {}
+            purchases = self.purchases.setdefault(level, {})
+            upgrades = self.upgrades.setdefault(level, {})
+            heals = self.heals.setdefault(level, {})
+            # Fights by stats, of the states sure to reach max_level after
+            # winning: the coins make no difference to those
+            capped = {}
+            # Purchases lower the coins, so the states they lead to are
+            # solved first
+            for key in sorted(graph, key=lambda key: key[-1]):
+                shop, shop_options, upgrade_options = graph[key]
+                options = []
+                for code, after, indexes, dominated in shop_options:
+                    if code:
+                        options.append(
+                            (code, values[after][indexes], dominated))
+                        continue
+                    won, upgrades[key] = self._best([
+                        (choice, self._next_values(later, level, after,
+                                                   indexes), beaten)
+                        for choice, after, indexes, beaten
+                        in upgrade_options])
+                    if won[1:].min() < self.max_level - TOLERANCE:
+                        fight, heals[key] = self._fight_values(shop, level,
+                                                               won)
+                    else:
+                        if key[:-1] not in capped:
+                            capped[key[:-1]] = self._fight_values(
+                                shop, level, won)
+                        fight, heals[key] = capped[key[:-1]]
+                    options.append((code, fight, dominated))
+                values[key], purchases[key] = self._best(options)
+
+            self.stats['most_values'] = max(self.stats['most_values'],
+                                            len(values) + len(later))
+            later = values
+            self._hit_matrices.clear()
+            self._hp_maps.clear()
+
+        if first >= self.max_level:
+            values = self._next_values(later, first - 1, None,
+                                       np.arange(self._size(hero)))
+        else:
+            values = later[_state_key(hero)]
+        self.origin = (first, _state_key(hero))
+        self.origin_values = values
+        return values
+
+    # Policy
+
+    def _index(self, hero):
+        # Nearest HP of the grid, keeping a hero still standing off index 0
+        if hero.hp <= 0:
+            return 0
+        hp = min(hero.hp, hero.max_hp)
+        return max(1, (hp + self.hp_step // 2) // self.hp_step)
+
+    def expected_level(self, hero, level=1):
+        """Expected level reached with the best play from this state."""
+        if self.origin != (level, _state_key(hero)):
+            self.solve(hero, level)
+        return float(self.origin_values[self._index(hero)])
+
+    def _policy(self, table, hero, level):
+        # A new game is solved on the first question
+        if self.origin is None:
+            self.solve()
+        try:
+            return table[level][_state_key(hero)]
+        except KeyError:
+            raise KeyError(f"Level {level} state {_state_key(hero)} is not "
+                           f"reachable from the solved start") from None
+
+    def best_purchase(self, hero, level):
+        """Item to buy next before the level's battle, or None to fight."""
+        codes = self._policy(self.purchases, hero, level)
+        return PURCHASES[codes[self._index(hero)]]
+
+    def best_upgrade(self, hero, level):
+        """Upgrade to pick after winning ``level``."""
+        codes = self._policy(self.upgrades, hero, level)
+        return rules.UPGRADES[codes[self._index(hero)]]
+
+    def should_heal(self, hero, enemy, level):
+        """Whether healing beats attacking in the current battle."""
+        heal_sets = self._policy(self.heals, hero, level)
+        enemy_hp, _ = self.enemy_stats(level, False)
+        power = max(rules.magic_power(hero), rules.attack_power(hero))
+        attacks = min((enemy_hp - enemy.hp) // power, len(heal_sets) - 1)
+        return bool(heal_sets[attacks][self._index(hero)])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve for the upgrade and shop choices that reach the "
+                    "furthest level on average.")
+    parser.add_argument('--max-level', type=int, default=MAX_LEVEL)
+    parser.add_argument('--hp-step', type=int, default=HP_STEP,
+                        choices=[1, 5], help='HP resolution (1 is exact)')
+    args = parser.parse_args()
+
+    solver = Solver(args.max_level, args.hp_step)
+    hero = rules.HeroState()
+    start = time.perf_counter()
+    expected = solver.expected_level(hero)
+    elapsed = time.perf_counter() - start
+
+    print(f"Expected level reached: {expected:.3f} of {args.max_level}")
+    print(f"Solved in {elapsed:.2f} s: {solver.stats['states']} states, "
+          f"{solver.stats['pruned']} choices pruned, values of at most "
+          f"{solver.stats['most_values']} states in memory at once")
+
+    # The choices of a hero who wins every level at full HP
+    print("\nChoices when every battle is won at full HP:")
+    for level in range(1, args.max_level):
+        bought = []
+        item = solver.best_purchase(hero, level)
+        while item is not None:
+            rules.buy(hero, item)
+            bought.append(item)
+            item = solver.best_purchase(hero, level)
+        choice = solver.best_upgrade(hero, level)
+        rules.upgrade(hero, choice)
+        hero.coins += rules.LEVEL_COINS
+        print(f"Level {level:2}: buy {', '.join(bought) or 'nothing'}; "
+              f"then upgrade {choice}")
+
+
+if __name__ == '__main__':
+    main()
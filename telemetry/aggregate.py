@@ -0,0 +1,339 @@
+"""Out-of-core aggregation of the CSV event files.
+
+The files are read in chunks and folded into a small rollup table per
+event type, with one row per (session_id, level, name) group holding the
+running count, sum, min and max of the group's value, plus the position
+and value of its first row. The per-level summaries the graphs need are
+computed from these rollups instead of from the raw rows, so memory is
+bounded by the number of groups, not by the number of events, and the
+results are the same as ``telemetry.summaries`` on the full frames.
+
+``LiveSource`` keeps the rollups in sync with files that are still being
+appended to and can persist them in ``game_data/.cache``, so the raw rows
+are only ever read once. Run ``python -m telemetry.aggregate [data_dir]``
+to bring the persisted rollups up to date.
+"""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from telemetry.frames import DTYPES, read_event_csv
+from telemetry.ingest import HEAD_SIZE, head_hash
+from telemetry.schema import COLUMNS, FRAME_ORDER
+from telemetry.summaries import resolve_sessions
+
+# Bump when the persisted rollup layout changes
+ROLLUP_VERSION = 1
+
+# File name of the persisted rollups in the cache directory
+ROLLUP_CACHE_NAME = 'rollups.pkl'
+
+# Group key of every rollup row; name is '' for event types without one
+ROLLUP_KEY = ['session_id', 'level', 'name']
+
+# Columns of a rollup table
+ROLLUP_COLUMNS = ROLLUP_KEY + ['count', 'sum', 'min', 'max', 'first_row',
+                               'first']
+
+# Name column, value column and the column whose first value is kept
+ROLLUP_SPECS = {
+    'damage': {'name': None, 'value': 'damage', 'first': None},
+    'health': {'name': None, 'value': 'health', 'first': 'max_health'},
+    'items': {'name': 'item_name', 'value': 'value', 'first': None},
+    'skills': {'name': 'skill_name', 'value': 'value', 'first': None},
+    'upgrades': {'name': 'attribute', 'value': 'value', 'first': None},
+}
+
+
+def empty_rollup():
+    return pd.DataFrame({column: pd.Series(dtype=object if column in (
+        'session_id', 'name') else 'int64') for column in ROLLUP_COLUMNS})
+
+
+def rollup_chunk(chunk, event_type, row_offset):
+    """Roll up one chunk of raw rows.
+
+    Args:
+        chunk: Raw event rows
+        event_type: Kind of event the rows are
+        row_offset: Position of the chunk's first row in the whole file
+    """
+    spec = ROLLUP_SPECS[event_type]
+    value = chunk[spec['value']]
+    # Wide types so sums never overflow
+    value = value.to_numpy(
+        dtype=np.float64 if value.dtype.kind == 'f' else np.int64)
+    df = pd.DataFrame({
+        'session_id': chunk['session_id'],
+        'level': chunk['level'],
+        'name': chunk[spec['name']] if spec['name'] else '',
+        'value': value,
+        'row': np.arange(row_offset, row_offset + len(chunk)),
+        'first': chunk[spec['first']] if spec['first'] else 0,
+    })
+    rollup = df.groupby(ROLLUP_KEY, observed=True, sort=False).agg(
+        count=('value', 'size'), sum=('value', 'sum'),
+        min=('value', 'min'), max=('value', 'max'),
+        first_row=('row', 'min'), first=('first', 'first'),
+    ).reset_index()
+    # Plain strings, so rollups of chunks with other categories combine
+    rollup['session_id'] = rollup['session_id'].astype(str).astype(object)
+    rollup['name'] = rollup['name'].astype(str).astype(object)
+    return rollup[ROLLUP_COLUMNS]
+
+
+def combine_rollups(parts):
+    """Merge rollup tables of the same event type into one."""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return empty_rollup()
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+
+    df = pd.concat(parts, ignore_index=True)
+    grouped = df.groupby(ROLLUP_KEY, sort=False)
+    combined = grouped.agg(
+        count=('count', 'sum'), sum=('sum', 'sum'), min=('min', 'min'),
+        max=('max', 'max'), first_row=('first_row', 'min'),
+    ).reset_index()
+    # The first value comes from the part holding the earliest row
+    firsts = df.loc[grouped['first_row'].idxmin(), ROLLUP_KEY + ['first']]
+    combined = combined.merge(firsts, on=ROLLUP_KEY)
+    return combined[ROLLUP_COLUMNS]
+
+
+def iter_chunks(path, event_type, chunksize):
+    """Yield the rows of a CSV event file in typed chunks."""
+    with open(path, 'rb') as f:
+        # New files start with the collector's header row
+        has_header = f.readline().startswith(b'session_id,')
+    # Timestamps are not needed by any summary
+    columns = [column for column in COLUMNS[event_type]
+               if column != 'timestamp']
+    reader = pd.read_csv(
+        path, header=None, names=COLUMNS[event_type], usecols=columns,
+        dtype={column: DTYPES[event_type][column] for column in columns},
+        skiprows=1 if has_header else 0, chunksize=chunksize)
+    with reader:
+        yield from reader
+
+
+def rollup_file(path, event_type, chunksize=1_000_000, row_offset=0):
+    """Roll up a whole CSV event file, one chunk at a time."""
+    rollup = empty_rollup()
+    for chunk in iter_chunks(path, event_type, chunksize):
+        rollup = combine_rollups(
+            [rollup, rollup_chunk(chunk, event_type, row_offset)])
+        row_offset += len(chunk)
+    return rollup
+
+
+def summarize_rollup(rollup, event_type):
+    """Per-level summary frame of an event type, from its rollup.
+
+    The frames have the same columns and values as the ``summarize_*``
+    functions of ``telemetry.summaries`` on the raw rows.
+    """
+    if event_type == 'damage':
+        by_level = rollup.groupby('level')
+        return (by_level['sum'].sum() / by_level['count'].sum()).rename(
+            'damage').reset_index()
+
+    if event_type == 'health':
+        by_level = rollup.groupby('level')
+        summary = (by_level['sum'].sum() / by_level['count'].sum()).rename(
+            'health').reset_index()
+        # max_health of the first row recorded for the level
+        firsts = rollup.loc[by_level['first_row'].idxmin()]
+        summary['max_health'] = firsts['first'].to_numpy()
+        return summary
+
+    if event_type == 'items':
+        by_name = rollup.groupby('name', sort=False).agg(
+            count=('count', 'sum'), first_row=('first_row', 'min'))
+        # Most bought first, ties in order of first purchase
+        by_name = by_name.sort_values(['count', 'first_row'],
+                                      ascending=[False, True])
+        return pd.DataFrame({'item_name': by_name.index.to_numpy(),
+                             'count': by_name['count'].to_numpy()})
+
+    name_column = ROLLUP_SPECS[event_type]['name']
+    by_name = rollup.groupby(['level', 'name'])
+    if event_type == 'skills':
+        value = by_name['sum'].sum() / by_name['count'].sum()
+    else:
+        value = by_name['max'].max()
+    summary = value.rename('value').reset_index()
+    return summary.rename(columns={'name': name_column})
+
+
+class RollupSource:
+    def __init__(self, rollups):
+        """Graph data answered from per-event-type rollup tables."""
+        self.rollups = rollups
+        self.all_sessions = self._all_sessions()
+
+    def _all_sessions(self):
+        # Every known session id; ids start with their start time
+        return sorted(set().union(
+            *(rollup['session_id'] for rollup in self.rollups.values())))
+
+    def sessions(self):
+        """Session ids in the order they were recorded."""
+        first_rows = self.rollups['damage'].groupby(
+            'session_id', sort=False)['first_row'].min()
+        return list(first_rows.sort_values().index)
+
+    def summary(self, event_type, sessions=None):
+        """Summary frame of one event type, optionally for some sessions."""
+        rollup = self.rollups[event_type]
+        if sessions is not None:
+            # The rollup has one row per group, not per event
+            session_ids = resolve_sessions(sessions, self.all_sessions)
+            rollup = rollup[rollup['session_id'].isin(session_ids)]
+        return summarize_rollup(rollup, event_type)
+
+
+def load_chunked(data_dir='game_data', chunksize=1_000_000):
+    """Roll up every CSV event file in ``data_dir`` in bounded memory."""
+    return RollupSource({
+        event_type: rollup_file(
+            os.path.join(data_dir, f"{event_type}.csv"), event_type,
+            chunksize)
+        for event_type in FRAME_ORDER
+    })
+
+
+class LiveSource(RollupSource):
+    def __init__(self, data_dir='game_data', cache_path=None,
+                 block_size=16 * 1024 * 1024):
+        """Rollups kept up to date with CSV files that are being appended to.
+
+        Args:
+            data_dir: Directory holding the CSV event files
+            cache_path: File the rollups are persisted to, so later runs
+                only read the rows appended since; not persisted if None
+            block_size: Most bytes parsed at once, so a long history is
+                still read in bounded memory
+        """
+        self.data_dir = data_dir
+        self.cache_path = cache_path
+        self.block_size = block_size
+        # Per event type: file identity and head hash, bytes and rows
+        # folded in so far
+        self.files = {}
+        rollups = {event_type: empty_rollup() for event_type in FRAME_ORDER}
+        cached = self._load_cache()
+        if cached is not None:
+            self.files, rollups = cached
+        super().__init__(rollups)
+        self.poll()
+
+    def _load_cache(self):
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if cached.get('version') != ROLLUP_VERSION:
+            return None
+        # Files may have been rewritten in place while nobody watched
+        for state in cached['files'].values():
+            state['checked'] = False
+        return cached['files'], cached['rollups']
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        files = {event_type: dict(state, checked=True)
+                 for event_type, state in self.files.items()}
+        with open(self.cache_path + '.tmp', 'wb') as f:
+            pickle.dump({'version': ROLLUP_VERSION, 'files': files,
+                         'rollups': self.rollups}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.cache_path + '.tmp', self.cache_path)
+
+    def poll(self):
+        """Fold in the rows appended since the last poll.
+
+        Returns:
+            Set of the event types whose rollups changed
+        """
+        changed = set()
+        moved = False
+        for event_type in FRAME_ORDER:
+            offset = self.files.get(event_type, {}).get('offset')
+            if self._poll_file(event_type):
+                changed.add(event_type)
+            moved = moved or (
+                self.files.get(event_type, {}).get('offset') != offset)
+        if changed:
+            self.all_sessions = self._all_sessions()
+        if moved and self.cache_path is not None:
+            self._save_cache()
+        return changed
+
+    def _poll_file(self, event_type):
+        path = os.path.join(self.data_dir, f"{event_type}.csv")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        identity = (stat.st_dev, stat.st_ino)
+
+        state = self.files.get(event_type)
+        if state is not None and (stat.st_size != state['offset']
+                                  or not state['checked']):
+            # Only read the head again when the file looks different
+            state['checked'] = (state['identity'] == identity
+                                and stat.st_size >= state['offset']
+                                and head_hash(path, state['head_size'])
+                                == state['head'])
+        changed = False
+        if state is None or not state['checked']:
+            # New, replaced (e.g. by compact_shards) or truncated file
+            changed = state is not None and state['rows'] > 0
+            state = self.files[event_type] = {
+                'identity': identity, 'offset': 0, 'rows': 0,
+                'head_size': 0, 'head': head_hash(path, 0), 'checked': True}
+            self.rollups[event_type] = empty_rollup()
+        if stat.st_size == state['offset']:
+            return changed
+
+        with open(path, 'rb') as f:
+            f.seek(state['offset'])
+            while True:
+                data = f.read(self.block_size)
+                # Leave a partly written last line for the next poll
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    break
+                rows = read_event_csv(data[:end], event_type)
+                self.rollups[event_type] = combine_rollups([
+                    self.rollups[event_type],
+                    rollup_chunk(rows, event_type, state['rows'])])
+                state['offset'] += end
+                state['rows'] += len(rows)
+                changed = changed or len(rows) > 0
+                f.seek(state['offset'])
+        state['head_size'] = min(HEAD_SIZE, state['offset'])
+        state['head'] = head_hash(path, state['head_size'])
+        return changed
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'game_data'
+    source = LiveSource(data_dir, os.path.join(data_dir, '.cache',
+                                               ROLLUP_CACHE_NAME))
+    groups = sum(len(rollup) for rollup in source.rollups.values())
+    events = sum(state['rows'] for state in source.files.values())
+    print(f"Rollups of {events} events in {groups} groups, "
+          f"{len(source.all_sessions)} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import abc
+import csv
+import os
+
+from telemetry.schema import CSV_HEADERS, EVENT_TYPES, TIMESTAMP_FORMAT
+
+
+class Backend(abc.ABC):
+    """Storage destination for the events recorded by the DataCollector.
+
+    Rows are handed over as ``(event_type, row)`` pairs where ``row`` is
+    ``[session_id, timestamp, floor, value_1, value_2]`` and ``timestamp``
+    is a ``datetime``.
+    """
+
+    # False for backends that throw every event away
+    enabled = True
+
+    @abc.abstractmethod
+    def write(self, rows):
+        """Store a batch of rows."""
+
+    def close(self):
+        """Release any open resources."""
+
+
+class NullBackend(Backend):
+    """Discards every event, for benchmark and simulation runs."""
+
+    enabled = False
+
+    def write(self, rows):
+        pass
+
+
+class CsvBackend(Backend):
+    def __init__(self, data_dir):
+        """Write one CSV file per event type into ``data_dir``."""
+        self.data_dir = data_dir
+
+        # Ensure the data directory exists
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+        self.paths = {
+            event_type: os.path.join(self.data_dir, f"{event_type}.csv")
+            for event_type in EVENT_TYPES
+        }
+
+        # Initialize each file with headers if they don't exist
+        for event_type, path in self.paths.items():
+            if not os.path.exists(path):
+                with open(path, 'w', newline='') as f:
+                    csv.writer(f).writerow(CSV_HEADERS[event_type])
+
+        # Open file handles, kept for the whole session
+        self._files = {}
+
+    def write(self, rows):
+        touched = set()
+        for event_type, row in rows:
+            if event_type not in self._files:
+                f = open(self.paths[event_type], 'a', newline='')
+                self._files[event_type] = (f, csv.writer(f))
+            f, writer = self._files[event_type]
+            session_id, timestamp, *values = row
+            writer.writerow(
+                [session_id, timestamp.strftime(TIMESTAMP_FORMAT), *values])
+            touched.add(f)
+
+        for f in touched:
+            f.flush()
+
+    def close(self):
+        for f, _ in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def create_backend(name, data_dir, session_id=None):
+    """Build the storage backend called ``name``.
+
+    Args:
+        name: "csv" for the CSV files, "binary" for the binary event log,
+            "sqlite" for the SQLite database, "sharded" for per-process
+            CSV shards or "null" to record nothing
+        data_dir: Directory the game data is stored in
+        session_id: Session being recorded, names the shard directory
+    """
+    if name == 'null':
+        return NullBackend()
+    if name == 'csv':
+        return CsvBackend(data_dir)
+    if name == 'binary':
+        # Only needs numpy when the binary log is actually used
+        from telemetry.binlog import BinaryLogBackend
+        return BinaryLogBackend(os.path.join(data_dir, 'events'))
+    if name == 'sharded':
+        from telemetry.shards import ShardBackend
+        return ShardBackend(data_dir, session_id)
+    if name == 'sqlite':
+        from telemetry.sqlite_store import SqliteBackend
+        return SqliteBackend(os.path.join(data_dir, 'telemetry.db'))
+    raise ValueError(f"Unknown telemetry backend: {name}")
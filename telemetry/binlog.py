@@ -0,0 +1,258 @@
+"""Compact binary event log, an alternative to the five CSV files.
+
+Each event type is stored in its own ``<event_type>.bin`` file made of
+fixed-width little-endian records (see ``RECORD_DTYPES``). Timestamps are
+stored as integer seconds and session ids and skill/item/stat names are
+dictionary-encoded: ``sessions.txt`` and ``names.txt`` hold one string per
+line and a record stores the line number. Dictionaries are only ever
+appended to, and always written before the records that use them.
+
+Run ``python -m telemetry.binlog [data_dir]`` to import the existing CSV
+history into ``data_dir/events``.
+"""
+import calendar
+import csv
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from telemetry.backends import Backend
+from telemetry.schema import EVENT_TYPES, FRAME_ORDER, TIMESTAMP_FORMAT
+
+# Fixed-width record layout of each event file
+RECORD_DTYPES = {
+    'damage': np.dtype([('session_id', '<u4'), ('timestamp', '<i8'),
+                        ('level', '<i4'), ('damage', '<i4'),
+                        ('attack_type', '<u2')]),
+    'health': np.dtype([('session_id', '<u4'), ('timestamp', '<i8'),
+                        ('level', '<i4'), ('health', '<i4'),
+                        ('max_health', '<i4')]),
+    'items': np.dtype([('session_id', '<u4'), ('timestamp', '<i8'),
+                       ('level', '<i4'), ('item_name', '<u2'),
+                       ('value', '<i4')]),
+    'skills': np.dtype([('session_id', '<u4'), ('timestamp', '<i8'),
+                        ('level', '<i4'), ('skill_name', '<u2'),
+                        ('value', '<i4')]),
+    'upgrades': np.dtype([('session_id', '<u4'), ('timestamp', '<i8'),
+                          ('level', '<i4'), ('attribute', '<u2'),
+                          ('value', '<f8')]),
+}
+
+# Fields stored as codes into the names dictionary
+NAME_FIELDS = {
+    'damage': 'attack_type',
+    'items': 'item_name',
+    'skills': 'skill_name',
+    'upgrades': 'attribute',
+}
+
+
+def _read_lines(path):
+    """Return the entries of a dictionary file."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+class _Dictionary:
+    def __init__(self, path):
+        """Append-only string table stored one entry per line."""
+        self.path = path
+        self.values = _read_lines(path)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+        self._unsaved = []
+
+    def encode(self, value):
+        """Return the code of ``value``, adding it if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            self._unsaved.append(value)
+        return code
+
+    def save(self):
+        """Append the entries added since the last save."""
+        if not self._unsaved:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{value}\n" for value in self._unsaved))
+        self._unsaved = []
+
+
+class BinaryLogBackend(Backend):
+    def __init__(self, log_dir):
+        """Append events to the binary event log in ``log_dir``."""
+        self.log_dir = log_dir
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self.sessions = _Dictionary(os.path.join(log_dir, 'sessions.txt'))
+        self.names = _Dictionary(os.path.join(log_dir, 'names.txt'))
+
+        # Open record files, kept for the whole session
+        self._files = {}
+
+    def record_path(self, event_type):
+        return os.path.join(self.log_dir, f"{event_type}.bin")
+
+    def _encode(self, event_type, row):
+        """Turn a collector row into a record tuple."""
+        session_id, timestamp, level, *values = row
+        name_field = NAME_FIELDS.get(event_type)
+        fields = RECORD_DTYPES[event_type].names[3:]
+        values = [self.names.encode(str(value)) if field == name_field
+                  else value
+                  for field, value in zip(fields, values)]
+        # Wall-clock seconds, so decoding gives back the same local time
+        seconds = calendar.timegm(timestamp.timetuple())
+        return (self.sessions.encode(str(session_id)), seconds, level,
+                *values)
+
+    def write(self, rows):
+        batches = {}
+        for event_type, row in rows:
+            batches.setdefault(event_type, []).append(
+                self._encode(event_type, row))
+
+        # Dictionaries first so every stored code can be decoded
+        self.sessions.save()
+        self.names.save()
+
+        for event_type, records in batches.items():
+            if event_type not in self._files:
+                self._files[event_type] = open(self.record_path(event_type),
+                                               'ab')
+            f = self._files[event_type]
+            f.write(np.array(records,
+                             dtype=RECORD_DTYPES[event_type]).tobytes())
+            f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def map_records(path, dtype):
+    """Memory-map a record file; a partly written last record is ignored."""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    count = size // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+def read_event_log(log_dir):
+    """Load the binary event log as the visualizer's five DataFrames.
+
+    The record files are memory-mapped, so nothing is parsed: numeric
+    columns come straight from the mapped records, timestamps are viewed
+    as ``datetime64[s]`` and names are decoded as categoricals.
+
+    Returns:
+        damage_df, health_df, items_df, skills_df, upgrades_df
+    """
+    import pandas as pd
+
+    sessions = pd.Index(_read_lines(os.path.join(log_dir, 'sessions.txt')))
+    names = pd.Index(_read_lines(os.path.join(log_dir, 'names.txt')))
+
+    frames = []
+    for event_type in FRAME_ORDER:
+        dtype = RECORD_DTYPES[event_type]
+        records = map_records(os.path.join(log_dir, f"{event_type}.bin"),
+                              dtype)
+
+        columns = {}
+        for field in dtype.names:
+            column = records[field]
+            if field == 'session_id' or field == NAME_FIELDS.get(event_type):
+                categories = sessions if field == 'session_id' else names
+                column = pd.Categorical.from_codes(
+                    column.astype(np.int32), categories
+                ).remove_unused_categories()
+                # Sorted like object strings, so groupby order is the same
+                column = column.reorder_categories(
+                    sorted(column.categories))
+            elif field == 'timestamp':
+                column = column.view('datetime64[s]')
+            columns[field] = column
+        frames.append(pd.DataFrame(columns, copy=False))
+
+    return tuple(frames)
+
+
+def _parse_csv_row(event_type, row):
+    """Convert a CSV row of strings into a collector row."""
+    session_id, timestamp, level, *values = row
+    dtype = RECORD_DTYPES[event_type]
+    parsed = []
+    for field, value in zip(dtype.names[3:], values):
+        if field == NAME_FIELDS.get(event_type):
+            parsed.append(value)
+        elif dtype[field].kind == 'f':
+            parsed.append(float(value))
+        else:
+            parsed.append(int(float(value)))
+    return [session_id, datetime.strptime(timestamp, TIMESTAMP_FORMAT),
+            int(level), *parsed]
+
+
+def import_csv_history(data_dir, log_dir=None, batch_size=10000):
+    """Append the rows of the CSV files in ``data_dir`` to the event log.
+
+    Args:
+        data_dir: Directory holding skills.csv, damage.csv, ...
+        log_dir: Event log directory, ``data_dir/events`` by default
+        batch_size: Number of rows converted per write
+
+    Returns:
+        Dictionary of imported row counts per event type
+    """
+    log_dir = log_dir or os.path.join(data_dir, 'events')
+    backend = BinaryLogBackend(log_dir)
+    counts = {}
+    try:
+        for event_type in EVENT_TYPES:
+            csv_path = os.path.join(data_dir, f"{event_type}.csv")
+            if not os.path.exists(csv_path):
+                continue
+            record_path = backend.record_path(event_type)
+            if os.path.exists(record_path) and os.path.getsize(record_path):
+                raise ValueError(
+                    f"{record_path} already has events, refusing to import "
+                    f"{csv_path} twice")
+
+            counts[event_type] = 0
+            batch = []
+            with open(csv_path, newline='') as f:
+                for row in csv.reader(f):
+                    # Skip blank lines and the header row
+                    if not row or row[0] == 'session_id':
+                        continue
+                    batch.append((event_type, _parse_csv_row(event_type, row)))
+                    if len(batch) >= batch_size:
+                        backend.write(batch)
+                        counts[event_type] += len(batch)
+                        batch = []
+            backend.write(batch)
+            counts[event_type] += len(batch)
+    finally:
+        backend.close()
+
+    return counts
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'game_data'
+    counts = import_csv_history(data_dir)
+    for event_type, count in counts.items():
+        print(f"{event_type}: imported {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Typed loading of the CSV event files into compact DataFrames.
+
+Session ids and skill/item/stat names have very few distinct values, so
+they are loaded as categoricals; levels and values use small integer
+types and timestamps are parsed to ``datetime64``. Run
+``python -m telemetry.frames [data_dir]`` for a report of the memory saved
+compared to loading everything as Python strings and int64.
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from telemetry.schema import COLUMNS, FRAME_ORDER, TIMESTAMP_FORMAT
+
+# Column dtypes of each event frame; timestamps are parsed separately
+DTYPES = {
+    'damage': {'session_id': 'category', 'level': 'int16',
+               'damage': 'int32', 'attack_type': 'category'},
+    'health': {'session_id': 'category', 'level': 'int16',
+               'health': 'int32', 'max_health': 'int32'},
+    'items': {'session_id': 'category', 'level': 'int16',
+              'item_name': 'category', 'value': 'int16'},
+    'skills': {'session_id': 'category', 'level': 'int16',
+               'skill_name': 'category', 'value': 'int32'},
+    # Speed upgrades are fractional
+    'upgrades': {'session_id': 'category', 'level': 'int16',
+                 'attribute': 'category', 'value': 'float64'},
+}
+
+
+def empty_frame(event_type):
+    """Typed frame of one event type without rows."""
+    return pd.DataFrame({
+        column: pd.Series(
+            dtype='datetime64[ns]' if column == 'timestamp'
+            else DTYPES[event_type][column])
+        for column in COLUMNS[event_type]
+    })
+
+
+def read_event_csv(source, event_type):
+    """Read one CSV event file, or raw CSV bytes, as a typed DataFrame."""
+    if isinstance(source, bytes):
+        data = source
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+
+    # New files start with the collector's header row
+    if data.startswith(b'session_id,'):
+        data = data[data.find(b'\n') + 1:]
+    if not data.strip():
+        return empty_frame(event_type)
+
+    df = pd.read_csv(io.BytesIO(data), header=None,
+                     names=COLUMNS[event_type], dtype=DTYPES[event_type])
+    df['timestamp'] = pd.to_datetime(df['timestamp'],
+                                     format=TIMESTAMP_FORMAT)
+    return df
+
+
+def append_rows(df, new_rows):
+    """Concatenate two typed frames, keeping the categorical columns.
+
+    A plain ``pd.concat`` falls back to object strings when the two
+    frames' categories differ.
+    """
+    if not len(df):
+        return new_rows
+    if not len(new_rows):
+        return df
+    columns = {}
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(
+                [df[column], new_rows[column]], sort_categories=True)
+        else:
+            columns[column] = pd.concat([df[column], new_rows[column]],
+                                        ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def _untyped_size(df):
+    """Bytes the frame would take with strings and int64 everywhere."""
+    size = df.index.memory_usage()
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            size += values.astype(object).memory_usage(deep=True,
+                                                       index=False)
+        elif column == 'timestamp':
+            size += values.dt.strftime(TIMESTAMP_FORMAT).astype(
+                object).memory_usage(deep=True, index=False)
+        else:
+            size += len(values) * 8
+    return size
+
+
+def memory_report(frames):
+    """Memory used by typed frames against the untyped layout.
+
+    Args:
+        frames: Dictionary of event type to typed frame
+
+    Returns:
+        DataFrame with rows, untyped and typed bytes per event type
+    """
+    rows = []
+    for event_type, df in frames.items():
+        rows.append({
+            'event_type': event_type,
+            'rows': len(df),
+            'untyped_bytes': _untyped_size(df),
+            'typed_bytes': df.memory_usage(deep=True).sum(),
+        })
+    report = pd.DataFrame(rows)
+    report.loc[len(report)] = ['total', report['rows'].sum(),
+                               report['untyped_bytes'].sum(),
+                               report['typed_bytes'].sum()]
+    report['saving'] = 1 - report['typed_bytes'] / report['untyped_bytes']
+    return report
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'game_data'
+    frames = {event_type: read_event_csv(
+        os.path.join(data_dir, f"{event_type}.csv"), event_type)
+        for event_type in FRAME_ORDER}
+    report = memory_report(frames)
+    print(report.to_string(index=False,
+                           formatters={'saving': '{:.0%}'.format}))
+
+
+if __name__ == "__main__":
+    main()
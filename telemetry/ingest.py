@@ -0,0 +1,97 @@
+"""Incremental loading of the CSV event files for the visualizer.
+
+The parsed frame of every event file is cached on disk together with the
+byte offset it was parsed up to and the identity of the file (device,
+inode and a hash of its first parsed bytes). On the next load only the bytes
+appended since then are parsed. A file that was truncated, rotated or
+rewritten (e.g. by ``compact_shards``) is parsed again from the start.
+"""
+import hashlib
+import os
+import pickle
+
+from telemetry.frames import append_rows, empty_frame, read_event_csv
+from telemetry.schema import FRAME_ORDER
+
+# Bump when the cached frame layout changes
+CACHE_VERSION = 2
+
+# Number of leading bytes hashed to recognise a file rewritten in place
+HEAD_SIZE = 1024
+
+
+def head_hash(path, size):
+    """Hash of the first ``size`` bytes of a file."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(size)).hexdigest()
+
+
+class IngestCache:
+    def __init__(self, data_dir='game_data', cache_dir=None):
+        """Parsed event frames kept in sync with the CSV files."""
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir or os.path.join(data_dir, '.cache')
+        # Cache entries already loaded in this process
+        self.entries = {}
+
+    def _cache_path(self, event_type):
+        return os.path.join(self.cache_dir, f"ingest_{event_type}.pkl")
+
+    def _load_entry(self, event_type):
+        if event_type in self.entries:
+            return self.entries[event_type]
+        try:
+            with open(self._cache_path(event_type), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        return entry
+
+    def _save_entry(self, event_type, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(event_type)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def load_frame(self, event_type):
+        """Bring one event frame up to date and return it."""
+        path = os.path.join(self.data_dir, f"{event_type}.csv")
+        stat = os.stat(path)  # FileNotFoundError like read_csv_files
+        identity = (stat.st_dev, stat.st_ino)
+
+        entry = self._load_entry(event_type)
+        if (entry is None or entry['identity'] != identity
+                or stat.st_size < entry['offset']
+                or head_hash(path, entry['head_size']) != entry['head']):
+            # Unknown, rotated or truncated file: start from scratch
+            entry = {'version': CACHE_VERSION, 'identity': identity,
+                     'offset': 0, 'head_size': 0,
+                     'head': head_hash(path, 0),
+                     'frame': empty_frame(event_type)}
+
+        if stat.st_size > entry['offset']:
+            with open(path, 'rb') as f:
+                f.seek(entry['offset'])
+                data = f.read(stat.st_size - entry['offset'])
+            # Leave a partly written last line for the next load
+            end = data.rfind(b'\n') + 1
+            if end:
+                new_rows = read_event_csv(data[:end], event_type)
+                frame = append_rows(entry['frame'], new_rows)
+                offset = entry['offset'] + end
+                head_size = min(HEAD_SIZE, offset)
+                entry = dict(entry, offset=offset, frame=frame,
+                             head_size=head_size,
+                             head=head_hash(path, head_size))
+                self._save_entry(event_type, entry)
+
+        self.entries[event_type] = entry
+        return entry['frame']
+
+    def load(self):
+        """Return damage_df, health_df, items_df, skills_df, upgrades_df."""
+        return tuple(self.load_frame(event_type)
+                     for event_type in FRAME_ORDER)
@@ -0,0 +1,29 @@
+# Event types recorded by the data collector, one CSV file each
+EVENT_TYPES = ['skills', 'upgrades', 'damage', 'health', 'items']
+
+# Header row the collector writes at the top of a new CSV file
+CSV_HEADERS = {
+    'skills': ['session_id', 'timestamp', 'floor', 'skill_name', 'effect'],
+    'upgrades': ['session_id', 'timestamp', 'floor', 'stat_upgraded',
+                 'new_value'],
+    'damage': ['session_id', 'timestamp', 'floor', 'damage_dealt',
+               'attack_type'],
+    'health': ['session_id', 'timestamp', 'floor', 'health_remaining',
+               'max_health'],
+    'items': ['session_id', 'timestamp', 'floor', 'item_name', 'cost'],
+}
+
+# Column names the visualizer uses for each event type
+COLUMNS = {
+    'damage': ['session_id', 'timestamp', 'level', 'damage', 'attack_type'],
+    'health': ['session_id', 'timestamp', 'level', 'health', 'max_health'],
+    'items': ['session_id', 'timestamp', 'level', 'item_name', 'value'],
+    'skills': ['session_id', 'timestamp', 'level', 'skill_name', 'value'],
+    'upgrades': ['session_id', 'timestamp', 'level', 'attribute', 'value'],
+}
+
+# Order of the frames returned by the visualizer loaders
+FRAME_ORDER = ['damage', 'health', 'items', 'skills', 'upgrades']
+
+# Timestamp format used in the CSV files
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
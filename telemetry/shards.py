@@ -0,0 +1,177 @@
+"""Per-process telemetry shards and their merge into the canonical CSVs.
+
+With the "sharded" backend every process writes its own set of CSV files
+under ``game_data/shards/<session_id>/``, so concurrent game or simulation
+processes never append to the same file. When the collector closes it
+drops a ``DONE`` marker into its shard.
+
+``compact_shards`` k-way merges the finished shards by timestamp into
+``game_data/<event_type>.csv`` (the files the visualizer reads) and
+removes them. Run it with ``python -m telemetry.shards [data_dir] [--all]``.
+"""
+import csv
+import heapq
+import os
+import shutil
+import sys
+
+from telemetry.backends import CsvBackend
+from telemetry.schema import CSV_HEADERS, EVENT_TYPES
+
+SHARD_DIR = 'shards'
+DONE_MARKER = 'DONE'
+
+
+class ShardBackend(CsvBackend):
+    def __init__(self, data_dir, session_id):
+        """Write this process's events into its own shard directory."""
+        super().__init__(os.path.join(data_dir, SHARD_DIR, session_id))
+
+    def close(self):
+        super().close()
+        # Tell compact_shards the shard is complete
+        open(os.path.join(self.data_dir, DONE_MARKER), 'w').close()
+
+
+def find_shards(data_dir, include_open=False):
+    """Shard directories ready to merge, oldest session first.
+
+    Args:
+        data_dir: Directory holding the canonical CSV files
+        include_open: Also return shards without a DONE marker, e.g. left
+            behind by a crashed process
+    """
+    root = os.path.join(data_dir, SHARD_DIR)
+    if not os.path.isdir(root):
+        return []
+    shards = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        if include_open or os.path.exists(os.path.join(path, DONE_MARKER)):
+            shards.append(path)
+    return shards
+
+
+def _read_rows(path):
+    """Yield the data rows of a CSV file, skipping the header."""
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if row and row[0] != 'session_id':
+                yield row
+
+
+def _has_header(path):
+    with open(path, newline='') as f:
+        return f.readline().startswith('session_id,')
+
+
+def _last_timestamp(path):
+    """Timestamp of the last row of a CSV file, without reading all of it."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().decode('utf-8', 'replace').splitlines()
+    for line in reversed(lines):
+        row = next(csv.reader([line]), None)
+        if row and len(row) > 1 and row[0] != 'session_id':
+            return row[1]
+    return None
+
+
+def _first_timestamp(path):
+    return next((row[1] for row in _read_rows(path)), None)
+
+
+def _sort_key(row):
+    # Timestamps are fixed-width, so text order is time order
+    return row[1], row[0]
+
+
+def merge_event_files(canonical_path, shard_paths, event_type):
+    """K-way merge shard CSV files into one canonical CSV file.
+
+    Shard rows are appended when they are all newer than the canonical
+    file's last row; otherwise the canonical file is rewritten with the
+    merged rows in timestamp order and swapped in atomically.
+
+    Returns:
+        Number of rows merged from the shards
+    """
+    firsts = [ts for ts in map(_first_timestamp, shard_paths) if ts]
+    if not firsts:
+        return 0
+
+    # Each shard is already in time order; count rows as they stream past
+    merged_count = 0
+
+    def counted(rows):
+        nonlocal merged_count
+        for row in rows:
+            merged_count += 1
+            yield row
+
+    shard_rows = [counted(_read_rows(path)) for path in shard_paths]
+
+    if not os.path.exists(canonical_path):
+        with open(canonical_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADERS[event_type])
+            writer.writerows(heapq.merge(*shard_rows, key=_sort_key))
+        return merged_count
+
+    last = _last_timestamp(canonical_path)
+    if last is None or min(firsts) >= last:
+        with open(canonical_path, 'a', newline='') as f:
+            csv.writer(f).writerows(heapq.merge(*shard_rows, key=_sort_key))
+        return merged_count
+
+    # Older rows than the canonical tail: rebuild the file in time order
+    tmp_path = canonical_path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        if _has_header(canonical_path):
+            writer.writerow(CSV_HEADERS[event_type])
+        writer.writerows(heapq.merge(_read_rows(canonical_path), *shard_rows,
+                                     key=_sort_key))
+    os.replace(tmp_path, canonical_path)
+    return merged_count
+
+
+def compact_shards(data_dir='game_data', include_open=False):
+    """Merge finished shards into the canonical CSV files and remove them.
+
+    Returns:
+        Dictionary of merged row counts per event type
+    """
+    shards = find_shards(data_dir, include_open)
+    counts = {}
+    if not shards:
+        return counts
+
+    for event_type in EVENT_TYPES:
+        shard_paths = [os.path.join(shard, f"{event_type}.csv")
+                       for shard in shards]
+        shard_paths = [path for path in shard_paths if os.path.exists(path)]
+        counts[event_type] = merge_event_files(
+            os.path.join(data_dir, f"{event_type}.csv"), shard_paths,
+            event_type)
+
+    for shard in shards:
+        shutil.rmtree(shard)
+    return counts
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--all']
+    data_dir = args[0] if args else 'game_data'
+    counts = compact_shards(data_dir, include_open='--all' in sys.argv)
+    if not counts:
+        print("No finished shards to merge")
+    for event_type, count in counts.items():
+        print(f"{event_type}: merged {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""SQLite storage for game telemetry.
+
+All events go into one database with a table per event type, indexed on
+``(session_id, floor)``. ``SqliteSource`` lets the visualizer push the
+session filter and the per-level aggregations down into SQL so only the
+small summary frames are ever loaded into pandas.
+"""
+import sqlite3
+
+from telemetry.backends import Backend
+from telemetry.schema import CSV_HEADERS, EVENT_TYPES, TIMESTAMP_FORMAT
+
+# Column types of each table, following the CSV headers
+COLUMN_TYPES = {
+    'skills': ['TEXT', 'TEXT', 'INTEGER', 'TEXT', 'INTEGER'],
+    'upgrades': ['TEXT', 'TEXT', 'INTEGER', 'TEXT', 'REAL'],
+    'damage': ['TEXT', 'TEXT', 'INTEGER', 'INTEGER', 'TEXT'],
+    'health': ['TEXT', 'TEXT', 'INTEGER', 'INTEGER', 'INTEGER'],
+    'items': ['TEXT', 'TEXT', 'INTEGER', 'TEXT', 'INTEGER'],
+}
+
+
+def connect(path):
+    """Open the telemetry database, creating tables and indexes."""
+    # The collector's flush thread writes, the game thread closes
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        for event_type in EVENT_TYPES:
+            columns = ', '.join(
+                f"{name} {column_type}" for name, column_type in
+                zip(CSV_HEADERS[event_type], COLUMN_TYPES[event_type]))
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {event_type} "
+                         f"({columns})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS "
+                         f"{event_type}_session_floor ON {event_type} "
+                         f"(session_id, floor)")
+    return conn
+
+
+class SqliteBackend(Backend):
+    def __init__(self, path):
+        """Write events into the SQLite database at ``path``."""
+        self.path = path
+        self.conn = connect(path)
+
+    def write(self, rows):
+        batches = {}
+        for event_type, row in rows:
+            session_id, timestamp, *values = row
+            batches.setdefault(event_type, []).append(
+                (session_id, timestamp.strftime(TIMESTAMP_FORMAT), *values))
+
+        # One transaction for the whole batch
+        with self.conn:
+            for event_type, records in batches.items():
+                placeholders = ', '.join('?' * len(CSV_HEADERS[event_type]))
+                self.conn.executemany(
+                    f"INSERT INTO {event_type} VALUES ({placeholders})",
+                    records)
+
+    def close(self):
+        self.conn.close()
+
+
+# Per-level aggregations, the SQL versions of telemetry.summaries
+SUMMARY_QUERIES = {
+    'damage': """
+        SELECT floor AS level, AVG(damage_dealt) AS damage
+        FROM damage {where}
+        GROUP BY floor ORDER BY floor""",
+    # With MIN() in the query SQLite takes the bare max_health column from
+    # the row holding the minimum, i.e. the first row recorded for the level
+    'health': """
+        SELECT floor AS level, AVG(health_remaining) AS health,
+               max_health, MIN(rowid) AS first_row
+        FROM health {where}
+        GROUP BY floor ORDER BY floor""",
+    'items': """
+        SELECT item_name, COUNT(*) AS count
+        FROM items {where}
+        GROUP BY item_name ORDER BY count DESC, MIN(rowid)""",
+    'skills': """
+        SELECT floor AS level, skill_name, AVG(effect) AS value
+        FROM skills {where}
+        GROUP BY floor, skill_name ORDER BY floor, skill_name""",
+    'upgrades': """
+        SELECT floor AS level, stat_upgraded AS attribute,
+               MAX(new_value) AS value
+        FROM upgrades {where}
+        GROUP BY floor, stat_upgraded ORDER BY floor, stat_upgraded""",
+}
+
+
+class SqliteSource:
+    def __init__(self, path):
+        """Graph data answered by queries against the telemetry database."""
+        self.path = path
+        self.conn = connect(path)
+
+    def sessions(self):
+        """Session ids in the order they were recorded."""
+        rows = self.conn.execute(
+            "SELECT session_id FROM damage "
+            "GROUP BY session_id ORDER BY MIN(rowid)").fetchall()
+        return [session_id for (session_id,) in rows]
+
+    def summary(self, event_type, sessions=None):
+        """Summary frame of one event type, optionally for some sessions.
+
+        Args:
+            event_type: Kind of event (e.g., "damage", "skills")
+            sessions: A session id, a list of ids, or a ``slice(first,
+                last)`` selecting every session from first to last
+        """
+        import pandas as pd
+
+        where, params = "", []
+        if isinstance(sessions, slice):
+            conditions = []
+            if sessions.start:
+                conditions.append("session_id >= ?")
+                params.append(sessions.start)
+            if sessions.stop:
+                conditions.append("session_id <= ?")
+                params.append(sessions.stop)
+            if conditions:
+                where = "WHERE " + " AND ".join(conditions)
+        elif sessions is not None:
+            params = [sessions] if isinstance(sessions, str) else list(
+                sessions)
+            where = f"WHERE session_id IN ({', '.join('?' * len(params))})"
+        summary = pd.read_sql_query(
+            SUMMARY_QUERIES[event_type].format(where=where), self.conn,
+            params=params)
+        if event_type == 'health':
+            summary = summary.drop(columns='first_row')
+        return summary
@@ -0,0 +1,136 @@
+"""Per-level summaries the visualizer's graphs are drawn from.
+
+Every graph only needs a few numbers per level. The ``summarize_*``
+functions reduce a raw event frame to that small frame, and every data
+source (in-memory frames, SQLite, ...) answers ``summary(event_type,
+sessions)`` with frames of exactly the same shape.
+"""
+import bisect
+
+import numpy as np
+import pandas as pd
+
+
+def summarize_damage(damage_df):
+    """Mean damage per level: columns level, damage."""
+    return damage_df.groupby('level')['damage'].mean().reset_index()
+
+
+def summarize_health(health_df):
+    """Mean health and first max health per level."""
+    return health_df.groupby('level').agg({
+        'health': 'mean',
+        'max_health': 'first'  # All max_health values are the same per level
+    }).reset_index()
+
+
+def summarize_items(items_df):
+    """Purchase count per item, most bought first."""
+    # Counted in order of first purchase so ties keep that order, whether
+    # the names are strings or categoricals
+    codes, names = pd.factorize(items_df['item_name'])
+    item_counts = pd.DataFrame({
+        'item_name': np.asarray(names, dtype=object),
+        'count': np.bincount(codes[codes >= 0], minlength=len(names)),
+    })
+    return item_counts.sort_values('count', ascending=False,
+                                   kind='stable', ignore_index=True)
+
+
+def summarize_skills(skills_df):
+    """Mean skill value per level and skill name."""
+    return skills_df.groupby(['level', 'skill_name'], observed=True)[
+        'value'].mean().reset_index()
+
+
+def summarize_upgrades(upgrades_df):
+    """Highest upgrade value per level and attribute."""
+    return upgrades_df.groupby(['level', 'attribute'], observed=True)[
+        'value'].max().reset_index()
+
+
+SUMMARIZERS = {
+    'damage': summarize_damage,
+    'health': summarize_health,
+    'items': summarize_items,
+    'skills': summarize_skills,
+    'upgrades': summarize_upgrades,
+}
+
+
+class SessionIndex:
+    def __init__(self, df):
+        """Row positions of every session in an event frame.
+
+        Built once with a single groupby pass, so selecting sessions later
+        costs O(rows in those sessions) instead of a scan of the frame.
+        """
+        self.positions = df.groupby('session_id', sort=False,
+                                    observed=True).indices
+
+    def rows(self, session_ids):
+        """Sorted row positions of the given sessions."""
+        parts = [self.positions[session_id] for session_id in session_ids
+                 if session_id in self.positions]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        # Keep recording order, e.g. for the first max_health of a level
+        return np.sort(np.concatenate(parts))
+
+
+class FrameSource:
+    def __init__(self, damage_df, health_df, items_df, skills_df,
+                 upgrades_df):
+        """Graph data held in memory as the five event DataFrames."""
+        self.frames = {
+            'damage': damage_df,
+            'health': health_df,
+            'items': items_df,
+            'skills': skills_df,
+            'upgrades': upgrades_df,
+        }
+        self.indexes = {event_type: SessionIndex(df)
+                        for event_type, df in self.frames.items()}
+        # Every known session id; ids start with their start time
+        self.all_sessions = sorted(set().union(
+            *(index.positions for index in self.indexes.values())))
+
+    def sessions(self):
+        """Session ids in the order they were recorded."""
+        return list(self.indexes['damage'].positions)
+
+    def session_ids(self, sessions):
+        """Resolve a session selection to a list of session ids.
+
+        Args:
+            sessions: A session id, a list of ids, or a ``slice(first,
+                last)`` selecting every session from first to last
+        """
+        return resolve_sessions(sessions, self.all_sessions)
+
+    def frame(self, event_type, sessions=None):
+        """Raw events of one type, optionally for selected sessions."""
+        df = self.frames[event_type]
+        if sessions is not None:
+            rows = self.indexes[event_type].rows(self.session_ids(sessions))
+            df = df.take(rows)
+        return df
+
+    def summary(self, event_type, sessions=None):
+        """Summary frame of one event type, optionally for some sessions."""
+        return SUMMARIZERS[event_type](self.frame(event_type, sessions))
+
+
+def resolve_sessions(sessions, all_sessions):
+    """Turn a session id, list of ids or slice range into a list of ids."""
+    if isinstance(sessions, str):
+        return [sessions]
+    if isinstance(sessions, slice):
+        first, last = sessions.start, sessions.stop
+        start = bisect.bisect_left(all_sessions, first) if first else 0
+        stop = (bisect.bisect_right(all_sessions, last) if last
+                else len(all_sessions))
+        return all_sessions[start:stop]
+    return list(sessions)
@@ -0,0 +1,115 @@
+"""Cached and rolled-up loading must answer exactly what a full read does."""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from telemetry.aggregate import LiveSource, load_chunked
+from telemetry.frames import read_event_csv
+from telemetry.ingest import IngestCache
+from telemetry.schema import FRAME_ORDER
+from telemetry.summaries import FrameSource
+
+GAME_DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'game_data')
+
+
+def _plain(summary):
+    # Names are categoricals in memory and strings in the rollups
+    return summary.apply(
+        lambda column: column if pd.api.types.is_numeric_dtype(column)
+        else column.astype(object))
+
+
+def _frame_source(data_dir):
+    return FrameSource(*(
+        read_event_csv(os.path.join(data_dir, f"{event_type}.csv"),
+                       event_type)
+        for event_type in FRAME_ORDER))
+
+
+def _assert_same_summaries(expected, source):
+    assert source.sessions() == expected.sessions()
+    sessions = expected.sessions()
+    selections = [None, sessions[1], sessions[2:5],
+                  slice(sessions[3], sessions[-2])]
+    for event_type in FRAME_ORDER:
+        for selection in selections:
+            pd.testing.assert_frame_equal(
+                _plain(source.summary(event_type, selection)),
+                _plain(expected.summary(event_type, selection)),
+                check_exact=True)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for event_type in FRAME_ORDER:
+        shutil.copy(os.path.join(GAME_DATA, f"{event_type}.csv"), tmp_path)
+    # A level of its own whose max health changes over more rows than a
+    # chunk, so its first value must come from the right chunk
+    with open(tmp_path / 'health.csv', 'a') as f:
+        for i in range(120):
+            f.write(f"20250513_120000,2025-05-13 12:{i // 60:02}:{i % 60:02},"
+                    f"40,{50 + i % 40},{100 + 50 * (i // 30)}\n")
+    return str(tmp_path)
+
+
+def test_chunked_matches_frames(data_dir):
+    # Chunks far smaller than the files, so groups span several chunks
+    _assert_same_summaries(_frame_source(data_dir),
+                           load_chunked(data_dir, chunksize=50))
+
+
+def test_live_matches_frames(data_dir):
+    cache_path = os.path.join(data_dir, '.cache', 'rollups.pkl')
+    _assert_same_summaries(_frame_source(data_dir),
+                           LiveSource(data_dir, cache_path, block_size=2048))
+    # Loaded again from the persisted rollups
+    _assert_same_summaries(_frame_source(data_dir),
+                           LiveSource(data_dir, cache_path))
+
+
+def test_live_matches_frames_after_appends(data_dir, tmp_path):
+    # Start from the first half of every file, then append the rest
+    rests = {}
+    for event_type in FRAME_ORDER:
+        path = os.path.join(data_dir, f"{event_type}.csv")
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        half = len(lines) // 2
+        with open(path, 'wb') as f:
+            f.writelines(lines[:half])
+        rests[path] = lines[half:]
+
+    source = LiveSource(data_dir, str(tmp_path / 'rollups.pkl'),
+                        block_size=2048)
+    for path, lines in rests.items():
+        with open(path, 'ab') as f:
+            f.writelines(lines)
+    assert source.poll() == set(FRAME_ORDER)
+    _assert_same_summaries(_frame_source(data_dir), source)
+
+
+def test_ingest_cache_matches_full_read(data_dir, tmp_path):
+    paths = [os.path.join(data_dir, f"{event_type}.csv")
+             for event_type in FRAME_ORDER]
+    rests = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        with open(path, 'wb') as f:
+            f.writelines(lines[:len(lines) // 2])
+        rests[path] = lines[len(lines) // 2:]
+    cache_dir = str(tmp_path / 'ingest')
+    IngestCache(data_dir, cache_dir).load()
+
+    for path, lines in rests.items():
+        with open(path, 'ab') as f:
+            f.writelines(lines)
+    # A new cache, so the appended rows come on top of the saved frames
+    frames = IngestCache(data_dir, cache_dir).load()
+    for event_type, frame in zip(FRAME_ORDER, frames):
+        expected = read_event_csv(
+            os.path.join(data_dir, f"{event_type}.csv"), event_type)
+        pd.testing.assert_frame_equal(_plain(frame), _plain(expected),
+                                      check_exact=True)
@@ -0,0 +1,16 @@
+"""Every telemetry backend must be able to store events."""
+import pytest
+
+from telemetry.backends import Backend, NullBackend
+
+
+def test_backend_without_write_cannot_be_created():
+    class Unfinished(Backend):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Unfinished()
+    with pytest.raises(TypeError):
+        Backend()
+    NullBackend().write([])
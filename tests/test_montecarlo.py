@@ -0,0 +1,56 @@
+"""The vectorized fights must win as often as rules.play_battle does."""
+import random
+
+from simulation import montecarlo, rules
+
+FIGHTS = 20000
+
+
+def attack(hero, enemy):
+    if rules.magic_power(hero) >= rules.attack_power(hero):
+        return rules.MAGIC_ATTACK
+    return rules.STRENGTH_ATTACK
+
+
+def heal_below_40(hero, enemy):
+    return rules.HEAL if hero.hp < 0.4 * hero.max_hp else attack(hero, enemy)
+
+
+def defend_below_half(hero, enemy):
+    if hero.hp < 0.5 * hero.max_hp:
+        return rules.DEFEND
+    return attack(hero, enemy)
+
+
+def defend_below_half_policy(hero, hero_hp, enemy_hp):
+    actions = montecarlo.best_attack(hero, hero_hp, enemy_hp)
+    actions[hero_hp < 0.5 * hero.max_hp] = montecarlo.DEFEND
+    return actions
+
+
+def battle_win_rate(hero, level, choose_action, seed):
+    rng = random.Random(seed)
+    wins = 0
+    for _ in range(FIGHTS):
+        fighter = rules.HeroState(hero.hp, hero.max_hp, hero.magic_level,
+                                  hero.strength_level, hero.speed)
+        outcome, _ = rules.play_battle(fighter, rules.EnemyState(level),
+                                       choose_action, rng,
+                                       montecarlo.MAX_TURNS)
+        wins += outcome == rules.WON
+    return wins / FIGHTS
+
+
+def test_win_rates_match_play_battle():
+    hero = rules.HeroState()
+    policies = [(montecarlo.best_attack, attack),
+                (montecarlo.heal_below(0.4), heal_below_40),
+                (defend_below_half_policy, defend_below_half)]
+    # Levels where the policies win some fights and lose others
+    for level in (2, 3, 4):
+        for seed, (policy, choose_action) in enumerate(policies):
+            results = montecarlo.simulate_level(hero, level, FIGHTS, policy,
+                                                rng=seed)
+            win_rate = montecarlo.summarize(results)['win_rate']
+            expected = battle_win_rate(hero, level, choose_action, seed)
+            assert abs(win_rate - expected) < 0.015
@@ -0,0 +1,19 @@
+"""Runs of a seed must not depend on how many processes play them."""
+import pandas as pd
+
+from simulation import runs
+
+
+def test_runs_match_across_jobs():
+    # More runs than one chunk, so the second process gets some
+    count = runs.CHUNK_SIZE * 2 + 100
+    for strategy in ('greedy', 'random'):
+        alone = runs.simulate_runs(count, 7, strategy, jobs=1, max_level=30)
+        pooled = runs.simulate_runs(count, 7, strategy, jobs=2, max_level=30)
+        pd.testing.assert_frame_equal(alone, pooled, check_exact=True)
+
+
+def test_seed_changes_runs():
+    first = runs.simulate_runs(200, 1, 'random', jobs=1)
+    second = runs.simulate_runs(200, 2, 'random', jobs=1)
+    assert not first.equals(second)
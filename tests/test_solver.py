@@ -0,0 +1,41 @@
+"""The solver's expected level must be what its choices reach in play."""
+import numpy as np
+
+from simulation import rules, runs, solver
+
+
+def harsh_enemy_stats(level, boss=False):
+    # Enemies that beat the best play within a few levels
+    return 80 + (level - 1) * 30, 25 + (level - 1) * 30
+
+
+def test_expected_level_matches_runs(monkeypatch):
+    max_level = 7
+    planner = solver.Solver(max_level, hp_step=1,
+                            enemy_stats=harsh_enemy_stats)
+    expected = planner.expected_level(rules.HeroState())
+    assert 2 < expected < max_level - 1
+
+    monkeypatch.setattr(rules, 'enemy_stats', harsh_enemy_stats)
+    monkeypatch.setitem(runs.OptimalStrategy.solvers, max_level, planner)
+    levels = runs.simulate_runs(4000, 11, 'optimal', jobs=1,
+                                max_level=max_level)['level']
+    # Four standard errors of the mean
+    assert abs(levels.mean() - expected) < 4 * levels.std() / 4000 ** 0.5
+
+
+def test_pruning_keeps_best_choice(monkeypatch):
+    heroes = [rules.HeroState(), rules.HeroState(coins=45),
+              rules.HeroState(strength_level=5, coins=35)]
+    pruned = solver.Solver(5, enemy_stats=harsh_enemy_stats)
+    pruned_values = [pruned.solve(hero) for hero in heroes]
+    assert pruned.stats['pruned']
+
+    def keep_all(self, options):
+        return [(choice, hero, indexes, np.zeros(len(indexes), dtype=bool))
+                for choice, hero, indexes in options]
+
+    monkeypatch.setattr(solver.Solver, '_prune', keep_all)
+    full = solver.Solver(5, enemy_stats=harsh_enemy_stats)
+    for hero, values in zip(heroes, pruned_values):
+        np.testing.assert_allclose(full.solve(hero), values, atol=1e-9)
@@ -0,0 +1,72 @@
+import pygame
+
+# Images the game always needs, loaded up front by preload()
+GAME_IMAGES = [
+    'images/character.png',
+    'images/health.png',
+    'images/monster.png',
+    'images/coins.png',
+    'images/potion.png',
+    'images/sword.png',
+    'images/wand.png',
+]
+
+# Surfaces by (path, size); size is None for the image as stored on disk
+_surfaces = {}
+
+# Keys of the cached surfaces already in the display's pixel format
+_converted = set()
+
+# Number of surfaces loaded, scaled or converted
+asset_stats = {'created': 0}
+
+
+def _to_display_format(surface):
+    # Only possible once the display mode is set
+    if pygame.display.get_surface() is None:
+        return surface, False
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha(), True
+    return surface.convert(), True
+
+
+def load_image(path, size=None):
+    """Image shared by every caller, loaded from disk only once.
+
+    Args:
+        path: Path of the image file (e.g., "images/monster.png")
+        size: (width, height) to scale to, or None for the original size
+
+    Returns:
+        Surface in the display's pixel format; callers must not draw on it
+    """
+    key = (path, tuple(size) if size else None)
+    surface = _surfaces.get(key)
+    if surface is not None and key in _converted:
+        return surface
+
+    if surface is None:
+        if size:
+            # Scaled variants are made from the original image
+            surface = pygame.transform.scale(load_image(path), size)
+        else:
+            surface = pygame.image.load(path)
+    # Surfaces cached before the display existed are converted now
+    surface, converted = _to_display_format(surface)
+    asset_stats['created'] += 1
+    _surfaces[key] = surface
+    if converted:
+        _converted.add(key)
+    return surface
+
+
+def preload(paths=GAME_IMAGES):
+    """Load images ahead of time, e.g. before the first frame."""
+    for path in paths:
+        load_image(path)
+
+
+def clear():
+    """Forget every cached surface."""
+    _surfaces.clear()
+    _converted.clear()
@@ -1,8 +1,3 @@
-import pygame
-
-# Initialize Pygame before using fonts
-pygame.init()
-
 # Constants
 WIDTH, HEIGHT = 800, 600
 WHITE = (255, 255, 255)
@@ -10,6 +5,3 @@ BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
-
-# Font
-FONT = pygame.font.Font(None, 36)
@@ -1,12 +1,76 @@
+import time
+
 import pygame
+from collections import OrderedDict
 from utils.constants import BLACK
 
+# Most bytes of rendered text surfaces kept around for reuse
+TEXT_CACHE_BUDGET = 4 * 1024 * 1024
+
+# Fonts by size, built once
+_fonts = {}
+
+# Rendered surfaces by (text, color, size, antialias), least recently used
+# first, and the bytes they take
+_text_cache = OrderedDict()
+_text_cache_bytes = 0
+
+# Hit and miss counters of the text cache, and seconds spent rendering
+# the misses
+text_cache_stats = {'hits': 0, 'misses': 0, 'render_time': 0.0}
+
+
+def get_font(font_size):
+    """Default font at the given size, created on first use."""
+    font = _fonts.get(font_size)
+    if font is None:
+        font = _fonts[font_size] = pygame.font.Font(None, font_size)
+    return font
+
+
+def render_text(text, color=BLACK, font_size=36, antialias=True):
+    """Rendered text surface, reused while it stays in the cache.
+
+    The surface is shared, so callers must not draw on it.
+    """
+    global _text_cache_bytes
+    key = (text, tuple(color), font_size, antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        text_cache_stats['hits'] += 1
+        return surface
+
+    text_cache_stats['misses'] += 1
+    start = time.perf_counter()
+    surface = get_font(font_size).render(text, antialias, color)
+    text_cache_stats['render_time'] += time.perf_counter() - start
+    size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+    _text_cache[key] = surface
+    _text_cache_bytes += size
+    # Drop the least recently used surfaces until back under budget
+    while _text_cache_bytes > TEXT_CACHE_BUDGET and len(_text_cache) > 1:
+        _, old = _text_cache.popitem(last=False)
+        _text_cache_bytes -= (old.get_width() * old.get_height()
+                              * old.get_bytesize())
+    return surface
+
+
+def clear_text_cache():
+    """Forget every cached surface and reset the counters."""
+    global _text_cache_bytes
+    _text_cache.clear()
+    _text_cache_bytes = 0
+    text_cache_stats['hits'] = text_cache_stats['misses'] = 0
+    text_cache_stats['render_time'] = 0.0
+
+
 def display_text(screen, text, x, y, color=BLACK, font_size=36, center=False):
-    font = pygame.font.Font(None, font_size)
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(text, color, font_size)
     text_rect = text_surface.get_rect()
     if center:
         text_rect.center = (x, y)
     else:
         text_rect.topleft = (x, y)
     screen.blit(text_surface, text_rect)
+    return text_rect
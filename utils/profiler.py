@@ -0,0 +1,199 @@
+import cProfile
+import csv
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+from utils.assets import asset_stats
+from utils.display import text_cache_stats
+from utils.render import Box, text_sprite
+
+# Frame phases, in the order the overlay shows them
+PHASES = ['events', 'update', 'draw', 'text', 'flip']
+
+# Number of recent frames the percentiles are taken over
+WINDOW = 300
+
+# Milliseconds between two refreshes of the overlay's numbers
+OVERLAY_REFRESH = 250
+
+# Where recordings and captures are written
+PROFILE_DIR = 'profiles'
+
+
+def _surfaces_created():
+    # Text renders and image loads/scales are where frames make surfaces
+    return text_cache_stats['misses'] + asset_stats['created']
+
+
+class FrameProfiler:
+    def __init__(self, profile_dir=PROFILE_DIR, details=None):
+        """Per-frame timings of the game loop, split into phases.
+
+        ``draw`` is building and blitting the sprites, without the time
+        spent rasterizing new text (``text``) and in
+        ``pygame.display.update()`` (``flip``).
+
+        Args:
+            profile_dir: Where recordings and captures are written
+            details: Called for more lines to show under the timings, e.g.
+                the game's debug info
+        """
+        self.profile_dir = profile_dir
+        self.details = details
+        self.frames = deque(maxlen=WINDOW)
+        self.visible = False
+        # CSV writer while recording, and its file
+        self.recording = None
+        self.record_file = None
+        # cProfile/tracemalloc capture of battle and shop scenes
+        self.capture_armed = False
+        self.capture = None
+        self.lines = []
+        self.last_refresh = 0.0
+
+    def begin_frame(self):
+        self.start = self.mark_time = time.perf_counter()
+        self.times = {}
+        self.text_time = text_cache_stats['render_time']
+        self.surfaces = _surfaces_created()
+
+    def mark(self, phase):
+        """End a phase of the current frame."""
+        now = time.perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self.mark_time
+        self.mark_time = now
+
+    def end_frame(self, flip_time, fps):
+        """Finish the frame's timings.
+
+        Args:
+            flip_time: Seconds the frame spent updating the display
+            fps: Frame rate reported by the game clock
+        """
+        text = text_cache_stats['render_time'] - self.text_time
+        frame = {phase: self.times.get(phase, 0.0) * 1000
+                 for phase in PHASES}
+        frame['text'] = text * 1000
+        frame['flip'] = flip_time * 1000
+        frame['draw'] = max(0.0, frame['draw'] - frame['text']
+                            - frame['flip'])
+        frame['total'] = (time.perf_counter() - self.start) * 1000
+        frame['surfaces'] = _surfaces_created() - self.surfaces
+        frame['fps'] = fps
+        self.frames.append(frame)
+
+        if self.recording is not None:
+            self.recording.writerow(frame)
+        if self.visible and (self.start - self.last_refresh) * 1000 >= \
+                OVERLAY_REFRESH:
+            self.last_refresh = self.start
+            self.lines = self.summary_lines()
+
+    def percentiles(self, key):
+        """p50, p95 and p99 of one phase over the recent frames, in ms."""
+        values = np.array([frame[key] for frame in self.frames])
+        if not len(values):
+            return 0.0, 0.0, 0.0
+        return tuple(np.percentile(values, [50, 95, 99]))
+
+    def summary_lines(self):
+        last = self.frames[-1] if self.frames else {'fps': 0, 'surfaces': 0}
+        lines = [f"FPS {last['fps']:.0f}   surfaces/frame "
+                 f"{last['surfaces']}",
+                 "ms         p50    p95    p99"]
+        for key in PHASES + ['total']:
+            p50, p95, p99 = self.percentiles(key)
+            lines.append(f"{key:<8}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        lines.append("R record" + (" [on]" if self.recording else "")
+                     + "   P capture" + (" [armed]" if self.capture_armed
+                                         else ""))
+        if self.recording is not None:
+            lines.append(f"to {self.record_file.name}")
+        if self.details is not None:
+            lines.extend(self.details())
+        return lines
+
+    def sprites(self):
+        """The overlay, drawn over the scene when visible."""
+        if not self.visible:
+            return []
+        texts = [text_sprite(line, 12, 10 + 18 * i, (255, 255, 255), 20)
+                 for i, line in enumerate(self.lines)]
+        # Wide enough for the longest line
+        width = max([250] + [text.rect.width + 14 for text in texts])
+        return [Box((20, 20, 20), (5, 5, width, 18 * len(texts) + 10))] + texts
+
+    def toggle_overlay(self):
+        self.visible = not self.visible
+        self.lines = self.summary_lines()
+
+    def toggle_recording(self):
+        """Start or stop writing every frame's timings to a CSV file."""
+        if self.recording is not None:
+            self.record_file.close()
+            self.recording = self.record_file = None
+            self.lines = self.summary_lines()
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir,
+                            f"frames_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        self.record_file = open(path, 'w', newline='')
+        self.recording = csv.DictWriter(
+            self.record_file, PHASES + ['total', 'surfaces', 'fps'])
+        self.recording.writeheader()
+        self.lines = self.summary_lines()
+        return path
+
+    def toggle_capture(self):
+        """Arm or disarm profiling of the next battle and shop scenes."""
+        self.capture_armed = not self.capture_armed
+        if not self.capture_armed:
+            self.stop_capture()
+        self.lines = self.summary_lines()
+
+    def scene_changed(self, name, captured):
+        """Start or stop a capture when the game changes scene.
+
+        Args:
+            name: Name of the new scene
+            captured: Whether the new scene is one to profile
+        """
+        self.stop_capture()
+        if self.capture_armed and captured:
+            self.capture = (name, cProfile.Profile())
+            tracemalloc.start()
+            self.capture[1].enable()
+
+    def stop_capture(self):
+        """Write the running capture's profile and allocations, if any."""
+        if self.capture is None:
+            return None
+        name, profile = self.capture
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.capture = None
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir,
+                            f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        profile.dump_stats(base + '.prof')
+        report = io.StringIO()
+        pstats.Stats(profile, stream=report).sort_stats(
+            'cumulative').print_stats(30)
+        report.write("\nTop allocations:\n")
+        for stat in snapshot.statistics('lineno')[:30]:
+            report.write(f"{stat}\n")
+        with open(base + '.txt', 'w') as f:
+            f.write(report.getvalue())
+        return base
+
+    def close(self):
+        self.stop_capture()
+        if self.recording is not None:
+            self.toggle_recording()
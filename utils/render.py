@@ -0,0 +1,124 @@
+import itertools
+import time
+
+import pygame
+from utils.constants import BLACK
+from utils.display import render_text
+
+
+class Blit:
+    def __init__(self, surface, pos):
+        """A surface drawn with its top-left corner at ``pos``."""
+        self.surface = surface
+        self.rect = surface.get_rect(topleft=pos)
+
+    def __eq__(self, other):
+        return (isinstance(other, Blit) and self.surface is other.surface
+                and self.rect == other.rect)
+
+    def draw(self, screen):
+        screen.blit(self.surface, self.rect)
+
+
+class Box:
+    def __init__(self, color, rect, width=0, border_radius=0):
+        """A filled rectangle, or its border when ``width`` is set."""
+        self.color = tuple(color)
+        self.rect = pygame.Rect(rect)
+        self.width = width
+        self.border_radius = border_radius
+
+    def __eq__(self, other):
+        return (isinstance(other, Box) and self.color == other.color
+                and self.rect == other.rect and self.width == other.width
+                and self.border_radius == other.border_radius)
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, self.color, self.rect, self.width,
+                         border_radius=self.border_radius)
+
+
+def text_sprite(text, x, y, color=BLACK, font_size=36, center=False):
+    """Text placed the same way as utils.display.display_text places it."""
+    surface = render_text(text, color, font_size)
+    sprite = Blit(surface, (x, y))
+    if center:
+        sprite.rect.center = (x, y)
+    return sprite
+
+
+def merge_rects(rects, bounds):
+    """Clip rects to ``bounds`` and join the ones that overlap."""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect = rect.union(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    def __init__(self, screen, background):
+        """Draws frames of sprites, updating only the regions that changed.
+
+        Args:
+            screen: Display surface
+            background: Surface behind every sprite, restored where a
+                sprite moved, changed or went away
+        """
+        self.screen = screen
+        self.background = background
+        # Sprites of the last frame; None forces a full redraw
+        self.drawn = None
+        # Seconds the last frame spent in pygame.display.update()
+        self.flip_time = 0.0
+
+    def reset(self, background=None):
+        """Redraw everything next frame, e.g. after drawing elsewhere."""
+        if background is not None:
+            self.background = background
+        self.drawn = None
+
+    def render(self, sprites):
+        """Draw a frame and update the display where it differs.
+
+        Args:
+            sprites: Blit/Box sprites of the frame, in drawing order
+
+        Returns:
+            List of the rects that were updated
+        """
+        bounds = self.screen.get_rect()
+        if self.drawn is None:
+            dirty = [bounds]
+        else:
+            dirty = []
+            # Sprites are matched up by their place in the drawing order
+            for old, new in itertools.zip_longest(self.drawn, sprites):
+                if old != new:
+                    if old is not None:
+                        dirty.append(old.rect)
+                    if new is not None:
+                        dirty.append(new.rect)
+        self.drawn = list(sprites)
+        dirty = merge_rects(dirty, bounds)
+
+        for area in dirty:
+            # Clip so sprites overlapping the area leave the rest alone
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area, area)
+            for sprite in self.drawn:
+                if sprite.rect.colliderect(area):
+                    sprite.draw(self.screen)
+        self.screen.set_clip(None)
+
+        start = time.perf_counter()
+        if dirty:
+            pygame.display.update(dirty)
+        self.flip_time = time.perf_counter() - start
+        return dirty